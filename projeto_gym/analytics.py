@@ -0,0 +1,65 @@
+# Análise da academia (todos os membros) para a página de administração.
+# Os agregados vêm de database.load_gym_analytics (só SQL); aqui eles ficam em
+# memória e uma thread os recalcula a cada INTERVALO_ATUALIZACAO segundos, então
+# abrir a página nunca dispara a consulta pesada (exceto na primeira vez).
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+
+import database
+
+INTERVALO_ATUALIZACAO = int(os.environ.get("FITNESSHUB_ANALISE_INTERVALO", "900"))
+SEMANAS_ANALISE = 12
+
+# Emails com acesso à página de análise (separados por vírgula)
+ADMINS = {email.strip().lower() for email in os.environ.get("FITNESSHUB_ADMINS", "").split(",")
+          if email.strip()}
+
+def is_admin(email):
+    return bool(email) and email.lower() in ADMINS
+
+class ScheduledAnalytics:
+    def __init__(self, intervalo=INTERVALO_ATUALIZACAO, semanas=SEMANAS_ANALISE):
+        self.intervalo = intervalo
+        self.semanas = semanas
+        self.snapshot = None  # {"gerado_em", "duracao_s", "semanas"}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def refresh(self):
+        inicio = time.perf_counter()
+        semanas = database.load_gym_analytics(self.semanas)
+        with self._lock:
+            self.snapshot = {"gerado_em": datetime.now(), "duracao_s": time.perf_counter() - inicio,
+                             "semanas": semanas}
+        return self.snapshot
+
+    def get(self):
+        self._start()
+        if self.snapshot is None:
+            return self.refresh()
+        return self.snapshot
+
+    def _start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name="gym-analytics", daemon=True)
+                self._thread.start()
+
+    def _loop(self):
+        while True:
+            time.sleep(self.intervalo)
+            try:
+                self.refresh()
+            except Exception as erro:  # a próxima rodada tenta de novo
+                print(f"gym-analytics: falha ao atualizar: {erro}", file=sys.stderr)
+
+_analytics = ScheduledAnalytics()
+
+def get_gym_analytics():
+    return _analytics.get()
+
+def refresh_gym_analytics():
+    return _analytics.refresh()
@@ -1,419 +1,57 @@
 import streamlit as st
 import pandas as pd
-import numpy as np
-from datetime import datetime, date, timedelta
+from datetime import datetime, timedelta
 import time
 import plotly.graph_objects as go
 import random
 import sqlite3
-import hashlib
 import re
+import io
+
+from database import (
+    ensure_schema, add_user, login_user,
+    create_session, resume_session, delete_session,
+    save_user_profile, load_user_profile, delete_user_profile,
+    save_workout_plan, load_workout_plans,
+    save_workout_history, load_workout_history_page,
+    save_food_log, search_foods,
+    save_progress_data, load_progress_data,
+    save_water_log, save_sleep_log,
+    load_daily_summary, load_concurrently, data_version, query_stats, EXPORT_QUERIES,
+)
+from nutrition import UNIDADES, get_engine
+from charts import get_figure, line_trace
+from trend import build_trend
+from analytics import is_admin, get_gym_analytics, refresh_gym_analytics
+from export import FORMATOS, export_bytes
+from import_history import import_history
+from import_foods import ArquivoInvalido
+from resources import DIAS_SEMANA, FRASES_MOTIVACIONAIS, GRUPOS_MUSCULARES, PIADAS, get_css
+
+# --- CARREGAMENTO SOB DEMANDA ---
+# Cada chave do session_state é carregada do banco só quando uma página precisa dela
+DATA_LOADERS = {
+    "user_data": load_user_profile,
+    "workout_plans": load_workout_plans,
+    "progress_data": load_progress_data,
+}
 
-# --- CONFIGURAÇÃO DE AUTENTICAÇÃO ---
-def make_hashes(password):
-    return hashlib.sha256(str.encode(password)).hexdigest()
-
-def check_hashes(password, hashed_text):
-    return make_hashes(password) == hashed_text
-
-# --- BANCO DE DADOS SQLITE ---
-def get_db_connection():
-    conn = sqlite3.connect("fitnesshub.db", check_same_thread=False)
-    return conn
-
-def create_tables():
-    conn = get_db_connection()
-    
-    # Tabela de usuários (autenticação)
-    conn.execute("""
-        CREATE TABLE IF NOT EXISTS users (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            email TEXT UNIQUE NOT NULL,
-            password TEXT NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    """)
-    
-    # Tabela de perfis de usuário
-    conn.execute("""
-        CREATE TABLE IF NOT EXISTS user_profiles (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER NOT NULL,
-            nome TEXT,
-            idade INTEGER,
-            genero TEXT,
-            altura INTEGER,
-            peso REAL,
-            objetivo TEXT,
-            nivel_atividade TEXT,
-            meta_peso REAL,
-            bmi REAL,
-            bmr REAL,
-            tdee REAL,
-            data_cadastro TEXT,
-            FOREIGN KEY (user_id) REFERENCES users (id)
-        )
-    """)
-    
-    # Tabela de treinos
-    conn.execute("""
-        CREATE TABLE IF NOT EXISTS workouts (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER NOT NULL,
-            plano_nome TEXT,
-            dias_semana TEXT,
-            exercicios TEXT,
-            data_criacao TEXT,
-            FOREIGN KEY (user_id) REFERENCES users (id)
-        )
-    """)
-    
-    # Tabela de histórico de treinos
-    conn.execute("""
-        CREATE TABLE IF NOT EXISTS workout_history (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER NOT NULL,
-            plano TEXT,
-            data TEXT,
-            inicio TEXT,
-            fim TEXT,
-            duracao REAL,
-            exercicios_completos TEXT,
-            FOREIGN KEY (user_id) REFERENCES users (id)
-        )
-    """)
-    
-    # Tabela de registro alimentar
-    conn.execute("""
-        CREATE TABLE IF NOT EXISTS food_log (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER NOT NULL,
-            data TEXT,
-            alimentos TEXT,
-            totais TEXT,
-            FOREIGN KEY (user_id) REFERENCES users (id)
-        )
-    """)
-    
-    # Tabela de progresso
-    conn.execute("""
-        CREATE TABLE IF NOT EXISTS progress_data (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER NOT NULL,
-            data TEXT,
-            peso REAL,
-            circunferencia_abdomen INTEGER,
-            observacoes TEXT,
-            FOREIGN KEY (user_id) REFERENCES users (id)
-        )
-    """)
-    
-    # Tabela de água
-    conn.execute("""
-        CREATE TABLE IF NOT EXISTS water_log (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER NOT NULL,
-            data TEXT,
-            ml INTEGER,
-            FOREIGN KEY (user_id) REFERENCES users (id)
-        )
-    """)
-    
-    # Tabela de sono
-    conn.execute("""
-        CREATE TABLE IF NOT EXISTS sleep_log (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER NOT NULL,
-            data TEXT,
-            horas REAL,
-            FOREIGN KEY (user_id) REFERENCES users (id)
-        )
-    """)
-    
-    conn.commit()
-    conn.close()
-
-# --- FUNÇÕES DE AUTENTICAÇÃO ---
-def add_user(email, password):
-    conn = get_db_connection()
-    cur = conn.cursor()
-    cur.execute("INSERT INTO users (email, password) VALUES (?, ?)", 
-                (email, make_hashes(password)))
-    conn.commit()
-    conn.close()
-
-def login_user(email, password):
-    conn = get_db_connection()
-    cur = conn.cursor()
-    cur.execute("SELECT * FROM users WHERE email = ?", (email,))
-    data = cur.fetchone()
-    conn.close()
-    
-    if data and check_hashes(password, data[2]):
-        return data[0]  # Retorna o user_id
-    return False
-
-def get_user_email(user_id):
-    conn = get_db_connection()
-    cur = conn.cursor()
-    cur.execute("SELECT email FROM users WHERE id = ?", (user_id,))
-    data = cur.fetchone()
-    conn.close()
-    return data[0] if data else None
-
-# --- FUNÇÕES DE PERFIL DO USUÁRIO ---
-def save_user_profile(user_id, user_data):
-    conn = get_db_connection()
-    cur = conn.cursor()
-    
-    # Verifica se já existe um perfil para este usuário
-    cur.execute("SELECT id FROM user_profiles WHERE user_id = ?", (user_id,))
-    existing_profile = cur.fetchone()
-    
-    if existing_profile:
-        # Atualiza o perfil existente
-        cur.execute("""
-            UPDATE user_profiles 
-            SET nome=?, idade=?, genero=?, altura=?, peso=?, objetivo=?, 
-                nivel_atividade=?, meta_peso=?, bmi=?, bmr=?, tdee=?, data_cadastro=?
-            WHERE user_id=?
-        """, (
-            user_data["nome"], user_data["idade"], user_data["genero"], user_data["altura"], 
-            user_data["peso"], user_data["objetivo"], user_data["nivel_atividade"], 
-            user_data["meta_peso"], user_data["bmi"], user_data["bmr"], user_data["tdee"], 
-            user_data["data_cadastro"], user_id
-        ))
-    else:
-        # Insere um novo perfil
-        cur.execute("""
-            INSERT INTO user_profiles 
-            (user_id, nome, idade, genero, altura, peso, objetivo, nivel_atividade, 
-             meta_peso, bmi, bmr, tdee, data_cadastro)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
-            user_id, user_data["nome"], user_data["idade"], user_data["genero"], 
-            user_data["altura"], user_data["peso"], user_data["objetivo"], 
-            user_data["nivel_atividade"], user_data["meta_peso"], user_data["bmi"], 
-            user_data["bmr"], user_data["tdee"], user_data["data_cadastro"]
-        ))
-    
-    conn.commit()
-    conn.close()
-
-def load_user_profile(user_id):
-    conn = get_db_connection()
-    cur = conn.cursor()
-    cur.execute("""
-        SELECT nome, idade, genero, altura, peso, objetivo, nivel_atividade, 
-               meta_peso, bmi, bmr, tdee, data_cadastro 
-        FROM user_profiles 
-        WHERE user_id = ?
-    """, (user_id,))
-    row = cur.fetchone()
-    conn.close()
-    
-    if row:
-        keys = ["nome", "idade", "genero", "altura", "peso", "objetivo", 
-                "nivel_atividade", "meta_peso", "bmi", "bmr", "tdee", "data_cadastro"]
-        return dict(zip(keys, row))
-    return None
-
-def delete_user_profile(user_id):
-    conn = get_db_connection()
-    conn.execute("DELETE FROM user_profiles WHERE user_id = ?", (user_id,))
-    conn.commit()
-    conn.close()
-
-# --- FUNÇÕES PARA DADOS DO USUÁRIO ---
-def save_workout_plan(user_id, plan_name, plan_data):
-    conn = get_db_connection()
-    conn.execute("""
-        INSERT INTO workouts (user_id, plano_nome, dias_semana, exercicios, data_criacao)
-        VALUES (?, ?, ?, ?, ?)
-    """, (user_id, plan_name, 
-          ','.join(plan_data["dias_semana"]), 
-          str(plan_data["exercicios"]), 
-          datetime.now().strftime("%Y-%m-%d")))
-    conn.commit()
-    conn.close()
-
-def load_workout_plans(user_id):
-    conn = get_db_connection()
-    cur = conn.cursor()
-    cur.execute("SELECT plano_nome, dias_semana, exercicios FROM workouts WHERE user_id = ?", (user_id,))
-    rows = cur.fetchall()
-    conn.close()
-    
-    plans = {}
-    for row in rows:
-        plans[row[0]] = {
-            "dias_semana": row[1].split(','),
-            "exercicios": eval(row[2]),
-            "data_criacao": row[3] if len(row) > 3 else ""
-        }
-    return plans
-
-def save_workout_history(user_id, workout_data):
-    conn = get_db_connection()
-    conn.execute("""
-        INSERT INTO workout_history 
-        (user_id, plano, data, inicio, fim, duracao, exercicios_completos)
-        VALUES (?, ?, ?, ?, ?, ?, ?)
-    """, (
-        user_id, workout_data["plano"], workout_data["data"], 
-        workout_data["inicio"], workout_data["fim"], workout_data["duracao"],
-        str(workout_data["exercicios_completos"])
-    ))
-    conn.commit()
-    conn.close()
-
-def load_workout_history(user_id):
-    conn = get_db_connection()
-    cur = conn.cursor()
-    cur.execute("""
-        SELECT plano, data, inicio, fim, duracao, exercicios_completos 
-        FROM workout_history 
-        WHERE user_id = ? 
-        ORDER BY data DESC, inicio DESC
-    """, (user_id,))
-    rows = cur.fetchall()
-    conn.close()
-    
-    history = []
-    for row in rows:
-        history.append({
-            "plano": row[0],
-            "data": row[1],
-            "inicio": row[2],
-            "fim": row[3],
-            "duracao": row[4],
-            "exercicios_completos": eval(row[5]) if row[5] else []
-        })
-    return history
-
-def save_food_log(user_id, food_data):
-    conn = get_db_connection()
-    conn.execute("""
-        INSERT INTO food_log (user_id, data, alimentos, totais)
-        VALUES (?, ?, ?, ?)
-    """, (
-        user_id, food_data["data"], str(food_data["alimentos"]), str(food_data["totais"])
-    ))
-    conn.commit()
-    conn.close()
-
-def load_food_log(user_id):
-    conn = get_db_connection()
-    cur = conn.cursor()
-    cur.execute("""
-        SELECT data, alimentos, totais 
-        FROM food_log 
-        WHERE user_id = ? 
-        ORDER BY data DESC
-    """, (user_id,))
-    rows = cur.fetchall()
-    conn.close()
-    
-    food_log = []
-    for row in rows:
-        food_log.append({
-            "data": row[0],
-            "alimentos": eval(row[1]) if row[1] else [],
-            "totais": eval(row[2]) if row[2] else {}
-        })
-    return food_log
-
-def save_progress_data(user_id, progress_data):
-    conn = get_db_connection()
-    conn.execute("""
-        INSERT INTO progress_data (user_id, data, peso, circunferencia_abdomen, observacoes)
-        VALUES (?, ?, ?, ?, ?)
-    """, (
-        user_id, progress_data["data"], progress_data["peso"], 
-        progress_data["circunferencia_abdomen"], progress_data["observacoes"]
-    ))
-    conn.commit()
-    conn.close()
-
-def load_progress_data(user_id):
-    conn = get_db_connection()
-    cur = conn.cursor()
-    cur.execute("""
-        SELECT data, peso, circunferencia_abdomen, observacoes 
-        FROM progress_data 
-        WHERE user_id = ? 
-        ORDER BY data DESC
-    """, (user_id,))
-    rows = cur.fetchall()
-    conn.close()
-    
-    progress = []
-    for row in rows:
-        progress.append({
-            "data": row[0],
-            "peso": row[1],
-            "circunferencia_abdomen": row[2],
-            "observacoes": row[3]
-        })
-    return progress
-
-def save_water_log(user_id, water_data):
-    conn = get_db_connection()
-    conn.execute("""
-        INSERT INTO water_log (user_id, data, ml)
-        VALUES (?, ?, ?)
-    """, (user_id, water_data["data"], water_data["ml"]))
-    conn.commit()
-    conn.close()
-
-def load_water_log(user_id):
-    conn = get_db_connection()
-    cur = conn.cursor()
-    cur.execute("""
-        SELECT data, ml 
-        FROM water_log 
-        WHERE user_id = ? 
-        ORDER BY data DESC
-    """, (user_id,))
-    rows = cur.fetchall()
-    conn.close()
-    
-    water_log = []
-    for row in rows:
-        water_log.append({
-            "data": row[0],
-            "ml": row[1]
-        })
-    return water_log
-
-def save_sleep_log(user_id, sleep_data):
-    conn = get_db_connection()
-    conn.execute("""
-        INSERT INTO sleep_log (user_id, data, horas)
-        VALUES (?, ?, ?)
-    """, (user_id, sleep_data["data"], sleep_data["horas"]))
-    conn.commit()
-    conn.close()
-
-def load_sleep_log(user_id):
-    conn = get_db_connection()
-    cur = conn.cursor()
-    cur.execute("""
-        SELECT data, horas 
-        FROM sleep_log 
-        WHERE user_id = ? 
-        ORDER BY data DESC
-    """, (user_id,))
-    rows = cur.fetchall()
-    conn.close()
-    
-    sleep_log = []
-    for row in rows:
-        sleep_log.append({
-            "data": row[0],
-            "horas": row[1]
-        })
-    return sleep_log
+# Tabelas de registro: depois da primeira carga só as linhas novas são buscadas
+SYNCED_DATA = {"progress_data"}
+
+# Dados usados por cada página (o perfil é sempre carregado, pois aparece no menu)
+PAGE_DATA = {
+    "Dashboard": [],
+    "Cadastro": [],
+    "Criar Plano de Treino": ["workout_plans"],
+    "Iniciar Treino": ["workout_plans"],
+    "Registrar Refeição": [],
+    "Dashboard Nutricional": [],
+    "Histórico de Treinos": [],
+    "Acompanhamento": ["progress_data"],
+    "Exportar Dados": [],
+    "Análise da Academia": [],
+}
 
 # --- EMBELEZAMENTO E CSS ---
 st.set_page_config(
@@ -423,153 +61,20 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-st.markdown("""
-<style>
-/* Fundo cinza escuro */
-.stApp {
-    background: #232323;
-}
-
-/* Cabeçalho principal */
-.main-header {
-    font-size: 2.5rem;
-    color: #ff9800;
-    text-align: center;
-    margin-bottom: 2rem;
-    font-weight: 900;
-    letter-spacing: 1px;
-    text-shadow: 1px 2px 8px #111;
-}
-
-/* Subcabeçalho */
-.sub-header {
-    font-size: 1.25rem;
-    color: #ff9800;
-    margin: 1.2rem 0 0.7rem 0;
-    border-left: 4px solid #ff9800;
-    padding-left: 10px;
-    font-weight: 600;
-    background: #333;
-    border-radius: 4px;
-}
-
-/* Cartões de métricas */
-.metric-card {
-    display: flex;
-    flex-direction: column;
-    background: #181818;
-    padding: 20px 16px 14px 16px;
-    border-radius: 12px;
-    color: #fff;
-    margin: 10px 0;
-    box-shadow: 0 2px 8px rgba(30,30,30,0.13);
-    text-align: center;
-    font-weight: 600;
-    border: 1px solid #444;
-    transition: box-shadow 0.2s, border 0.2s;
-    border-left: 5px solid #ff9800;
-    
-}
-
-.metric-card:hover {
-    box-shadow: 0 4px 16px rgba(255,152,0,0.13);
-    border-left: 5px solid #ffa726;
-}
-
-/* Cartões de treino e alimentação */
-.workout-card, .food-card {
-    background: #232323;
-    border-radius: 8px;
-    padding: 13px;
-    margin: 10px 0;
-    border-left: 4px solid #ff9800;
-    box-shadow: 0 1px 4px rgba(30,30,30,0.10);
-    color: #fff;
-}
-.food-card { border-left: 4px solid #ffa726; }
-.completed {
-    background: #2e2e2e;
-    border-left: 4px solid #ffb74d;
-}
-
-/* Botões */
-.stButton button {
-    width: 100%;
-    border-radius: 7px;
-    background: linear-gradient(90deg, #ff9800 0%, #ffa726 100%);
-    color: #181818;
-    font-weight: bold;
-    border: none;
-    padding: 0.7em 0;
-    font-size: 1.08em;
-    box-shadow: 0 1px 4px rgba(255,152,0,0.10);
-    transition: background 0.2s, transform 0.2s;
-}
-.stButton button:hover {
-    background: linear-gradient(90deg, #ffa726 0%, #ff9800 100%);
-    color: #fff;
-    transform: scale(1.01);
-}
-
-/* Divisor de seção */
-.section-divider {
-    height: 2px;
-    background: linear-gradient(90deg, transparent, #ff9800, transparent);
-    margin: 1.2rem 0;
-    border-radius: 2px;
-}
-
-/* Sidebar customizado */
-[data-testid="stSidebar"] {
-    background: #181818;
-    color: #fff;
-}
-[data-testid="stSidebar"] .stImage img {
-    border-radius: 10px;
-    margin-bottom: 1em;
-    box-shadow: 0 1px 4px rgba(255,152,0,0.13);
-}
-[data-testid="stSidebar"] .stTitle {
-    color: #ff9800;
-    font-weight: 900;
-    letter-spacing: 1px;
-    
-}
-[data-testid="stSidebar"] .stMarkdown {
-    color: #ffa726;
-    font-weight: 600;
-}
-
-/* Formulários de login */
-.login-container {
-    background: #1e1e1e;
-    padding: 2rem;
-    border-radius: 12px;
-    border: 1px solid #444;
-    margin: 2rem auto;
-    max-width: 500px;
-}
-.login-header {
-    text-align: center;
-    color: #ff9800;
-    margin-bottom: 1.5rem;
-    font-size: 1.8rem;
-}
-</style>
-""", unsafe_allow_html=True)
+# CSS lido e compactado uma vez por processo (resources.get_css); precisa ser
+# reenviado a cada rerun, senão o Streamlit remove o estilo da página
+st.markdown(get_css(), unsafe_allow_html=True)
 
 class FitnessHub:
     def __init__(self):
-        create_tables()  # Cria as tabelas no banco de dados
+        ensure_schema()  # Migrações só na primeira execução do processo
         self.initialize_session_state()
-        self.load_food_database()
-        self.load_motivational_phrases()
-        self.load_jokes()
         
     def initialize_session_state(self):
         defaults = {
             "user_id": None,
             "user_email": None,
+            "session_token": None,
             "user_data": None,
             "workout_plans": {},
             "active_workout": None,
@@ -584,72 +89,17 @@ class FitnessHub:
             "water_log": [],
             "sleep_log": [],
             "selected": "Dashboard",
-            "just_logged_in": False
+            "just_logged_in": False,
+            "loaded_data": set(),
+            "last_seen": {},
+            "history_cursors": [None],
+            "load_timings": {},
+            "weight_trend": None
         }
         for key, value in defaults.items():
             if key not in st.session_state:
                 st.session_state[key] = value
 
-    def load_food_database(self):
-        self.food_db = {
-            "Proteínas": {
-                "Peito de Frango (100g)": {"calorias": 165, "proteina": 31, "carboidrato": 0, "gordura": 3.6},
-                "Ovo (1 unidade)": {"calorias": 78, "proteina": 6, "carboidrato": 0.6, "gordura": 5},
-                "Salmão (100g)": {"calorias": 208, "proteina": 20, "carboidrato": 0, "gordura": 13},
-                "Carne Bovina (100g)": {"calorias": 250, "proteina": 26, "carboidrato": 0, "gordura": 15},
-                "Whey Protein (30g)": {"calorias": 120, "proteina": 24, "carboidrato": 3, "gordura": 1},
-                "Iogurte Grego (100g)": {"calorias": 59, "proteina": 10, "carboidrato": 3.6, "gordura": 0.4},
-                "Queijo Cottage (100g)": {"calorias": 98, "proteina": 11, "carboidrato": 3.4, "gordura": 4.3},
-            },
-            "Carboidratos": {
-                "Arroz Integral (100g cozido)": {"calorias": 112, "proteina": 2.6, "carboidrato": 23, "gordura": 0.9},
-                "Batata Doce (100g)": {"calorias": 86, "proteina": 1.6, "carboidrato": 20, "gordura": 0.1},
-                "Aveia (100g)": {"calorias": 389, "proteina": 16.9, "carboidrato": 66, "gordura": 6.9},
-                "Pão Integral (1 fatia)": {"calorias": 69, "proteina": 3.5, "carboidrato": 11, "gordura": 0.9},
-                "Massa Integral (100g cozido)": {"calorias": 124, "proteina": 5, "carboidrato": 25, "gordura": 1},
-                "Quinoa (100g cozido)": {"calorias": 120, "proteina": 4.4, "carboidrato": 21, "gordura": 1.9},
-                "Banana (1 unidade)": {"calorias": 105, "proteina": 1.3, "carboidrato": 27, "gordura": 0.4},
-            },
-            "Gorduras": {
-                "Abacate (100g)": {"calorias": 160, "proteina": 2, "carboidrato": 9, "gordura": 15},
-                "Azeite de Oliva (1 colher)": {"calorias": 119, "proteina": 0, "carboidrato": 0, "gordura": 14},
-                "Castanhas (30g)": {"calorias": 180, "proteina": 5, "carboidrato": 6, "gordura": 16},
-                "Manteiga de Amendoim (1 colher)": {"calorias": 96, "proteina": 4, "carboidrato": 3, "gordura": 8},
-                "Semente de Chia (20g)": {"calorias": 97, "proteina": 3, "carboidrato": 8, "gordura": 6},
-                "Coco (100g)": {"calorias": 354, "proteina": 3.3, "carboidrato": 15, "gordura": 33},
-                "Azeitonas (100g)": {"calorias": 115, "proteina": 0.8, "carboidrato": 6, "gordura": 11},
-            },
-            "Vegetais": {
-                "Brócolis (100g)": {"calorias": 34, "proteina": 2.8, "carboidrato": 7, "gordura": 0.4},
-                "Espinafre (100g)": {"calorias": 23, "proteina": 2.9, "carboidrato": 3.6, "gordura": 0.4},
-                "Cenoura (100g)": {"calorias": 41, "proteina": 0.9, "carboidrato": 10, "gordura": 0.2},
-                "Alface (100g)": {"calorias": 15, "proteina": 1.4, "carboidrato": 2.9, "gordura": 0.2},
-                "Tomate (100g)": {"calorias": 18, "proteina": 0.9, "carboidrato": 3.9, "gordura": 0.2},
-                "Pepino (100g)": {"calorias": 15, "proteina": 0.7, "carboidrato": 3.6, "gordura": 0.1},
-                "Pimentão (100g)": {"calorias": 31, "proteina": 1, "carboidrato": 6, "gordura": 0.3},
-            }
-        }
-
-    def load_motivational_phrases(self):
-        self.motivational_phrases = [
-            "Acredite em você! Cada passo conta.",
-            "Você é mais forte do que imagina.",
-            "Disciplina é o caminho para o sucesso.",
-            "Não desista, o progresso é construído dia após dia.",
-            "Seu esforço de hoje é o resultado de amanhã.",
-            "A jornada pode ser difícil, mas a vitória é certa para quem persiste.",
-            "Seja constante, não perfeito.",
-            "O impossível é apenas o possível que nunca foi tentado."
-        ]
-
-    def load_jokes(self):
-        self.jokes = [
-            "Por que o computador foi ao médico? Porque estava com um vírus!",
-            "O que o zero disse para o oito? Belo cinto!",
-            "Por que o livro foi ao hospital? Porque ele tinha muitas páginas amarelas.",
-            "O que o tomate foi fazer no banco? Tirar extrato."
-        ]
-
     def login_section(self):
         st.markdown('<div class="login-header">💪 FitBuddy</div>', unsafe_allow_html=True)
         st.markdown('<div style="text-align: center; margin-bottom: 2rem; color: #ffa726;">Seu Companheiro Fitness<br><br>NÃO UTILIZE DADOS REAIS</div>', unsafe_allow_html=True)
@@ -668,7 +118,9 @@ class FitnessHub:
                         st.session_state.user_id = user_id
                         st.session_state.user_email = email
                         st.session_state.just_logged_in = True
-                        self.load_user_data()
+                        # Token na URL: um refresh retoma a sessão sem novo login
+                        st.session_state.session_token = create_session(user_id)
+                        st.query_params["sessao"] = st.session_state.session_token
                         st.success("Login realizado com sucesso!")
                         st.rerun()
                     else:
@@ -696,30 +148,63 @@ class FitnessHub:
                             st.error("Este email já está em uso")
 
     def load_user_data(self):
-        # Carrega os dados do usuário do banco de dados
+        # No login só o perfil é carregado; o restante vem sob demanda (ensure_data)
         if st.session_state.user_id:
-            # Carrega perfil do usuário
-            st.session_state.user_data = load_user_profile(st.session_state.user_id)
-            
-            # Carrega planos de treino
-            st.session_state.workout_plans = load_workout_plans(st.session_state.user_id)
-            
-            # Carrega histórico de treinos
-            st.session_state.workout_history = load_workout_history(st.session_state.user_id)
-            
-            # Carrega registro alimentar
-            st.session_state.food_log = load_food_log(st.session_state.user_id)
-            
-            # Carrega dados de progresso
-            st.session_state.progress_data = load_progress_data(st.session_state.user_id)
-            
-            # Carrega registro de água
-            st.session_state.water_log = load_water_log(st.session_state.user_id)
-            
-            # Carrega registro de sono
-            st.session_state.sleep_log = load_sleep_log(st.session_state.user_id)
+            st.session_state.loaded_data = set()
+            st.session_state.last_seen = {}
+            st.session_state.weight_trend = None
+            self.ensure_data("user_data")
+
+    def ensure_data(self, *keys):
+        # Carrega do banco as chaves ainda não presentes na sessão;
+        # as tabelas de registro são sincronizadas a cada rerun.
+        # As consultas rodam em paralelo e o tempo de cada uma fica em load_timings.
+        tarefas = {}
+        for key in keys:
+            if key in SYNCED_DATA:
+                # Busca só as linhas com id maior que o último visto nesta sessão
+                # (a primeira chamada, com last_seen 0, é a carga completa)
+                if key not in st.session_state.loaded_data:
+                    st.session_state[key] = []
+                    st.session_state.last_seen[key] = 0
+                    st.session_state.loaded_data.add(key)
+                tarefas[key] = (DATA_LOADERS[key], st.session_state.user_id, st.session_state.last_seen[key])
+            elif key not in st.session_state.loaded_data:
+                tarefas[key] = (DATA_LOADERS[key], st.session_state.user_id)
+        resultados, tempos = load_concurrently(tarefas)
+        for key, valor in resultados.items():
+            if key in SYNCED_DATA:
+                self.merge_synced(key, valor)
+            else:
+                st.session_state[key] = valor
+                st.session_state.loaded_data.add(key)
+        st.session_state.load_timings.update(tempos)
+
+    def merge_synced(self, key, novos):
+        if novos:
+            # Mantém a ordem do banco: mais recentes primeiro
+            registros = novos + st.session_state[key]
+            registros.sort(key=lambda r: (r["data"] or "", r.get("inicio") or ""), reverse=True)
+            st.session_state[key] = registros
+            st.session_state.last_seen[key] = max(r["id"] for r in novos)
+
+    def restore_session(self):
+        # Refresh/reconexão: retoma a sessão pelo token da URL (uma busca pela chave)
+        token = st.query_params.get("sessao")
+        if not token:
+            return
+        sessao = resume_session(token)
+        if sessao:
+            st.session_state.user_id, st.session_state.user_email = sessao
+            st.session_state.session_token = token
+            st.session_state.just_logged_in = True
+        else:
+            del st.query_params["sessao"]
 
     def logout(self):
+        if st.session_state.session_token:
+            delete_session(st.session_state.session_token)
+        st.query_params.clear()
         # Limpa todos os dados da sessão
         for key in list(st.session_state.keys()):
             del st.session_state[key]
@@ -728,19 +213,18 @@ class FitnessHub:
 
     def motivational_card(self):
         st.markdown('<div class="sub-header">💡 Motivação do Dia</div>', unsafe_allow_html=True)
-        st.info(f"**{random.choice(self.motivational_phrases)}**")
+        st.info(f"**{random.choice(FRASES_MOTIVACIONAIS)}**")
 
     def joke_card(self):
         st.markdown('<div class="sub-header">😂 Sorria!</div>', unsafe_allow_html=True)
-        st.success(f"_{random.choice(self.jokes)}_")
+        st.success(f"_{random.choice(PIADAS)}_")
 
-    def water_tracker(self, meta_agua=None):
+    def water_tracker(self, meta_agua=None, resumo_hoje=None):
         st.markdown('<div class="sub-header">💧 Controle de Água</div>', unsafe_allow_html=True)
         today = datetime.now().strftime("%Y-%m-%d")
         
-        # Filtra apenas os registros de água de hoje
-        water_today = [w for w in st.session_state.water_log if w["data"] == today]
-        total_ml = sum([w["ml"] for w in water_today])
+        # Total de hoje vem do resumo diário (daily_summary)
+        total_ml = (resumo_hoje or {}).get("water_ml", 0)
         
         st.write(f"Total consumido hoje: **{total_ml} ml**")
         ml = st.number_input("Adicionar água (ml)", min_value=50, max_value=2000, step=50, value=250)
@@ -748,7 +232,6 @@ class FitnessHub:
         if st.button("Registrar Água"):
             water_data = {"data": today, "ml": ml}
             save_water_log(st.session_state.user_id, water_data)
-            st.session_state.water_log.append(water_data)
             st.success(f"{ml} ml adicionados!")
             st.rerun()
         
@@ -756,24 +239,23 @@ class FitnessHub:
         meta = meta_agua if meta_agua else 2000
         st.progress(min(total_ml/meta, 1.0), text=f"Meta diária: {meta}ml")
 
-    def sleep_tracker(self):
+    def sleep_tracker(self, resumo_hoje=None):
         st.markdown('<div class="sub-header">😴 Controle de Sono</div>', unsafe_allow_html=True)
         today = datetime.now().strftime("%Y-%m-%d")
         
-        # Filtra apenas os registros de sono de hoje
-        sleep_today = [s for s in st.session_state.sleep_log if s["data"] == today]
+        # Último registro de sono de hoje, do resumo diário
+        sleep_today = (resumo_hoje or {}).get("sleep_horas")
         
         horas = st.number_input("Horas de sono na última noite", min_value=0.0, max_value=24.0, step=0.5, value=8.0)
         
         if st.button("Registrar Sono"):
             sleep_data = {"data": today, "horas": horas}
             save_sleep_log(st.session_state.user_id, sleep_data)
-            st.session_state.sleep_log.append(sleep_data)
             st.success(f"{horas} horas registradas!")
             st.rerun()
         
-        if sleep_today:
-            st.write(f"Hoje: {sleep_today[-1]['horas']} horas")
+        if sleep_today is not None:
+            st.write(f"Hoje: {sleep_today} horas")
         else:
             st.info("Registre suas horas de sono para acompanhar seu descanso.")
 
@@ -898,19 +380,10 @@ class FitnessHub:
             return
         with st.form("workout_plan"):
             nome_plano = st.text_input("Nome do Plano*")
-            dias_semana = st.multiselect("Dias da Semana*",
-                ["Segunda", "Terça", "Quarta", "Quinta", "Sexta", "Sábado", "Domingo"])
+            dias_semana = st.multiselect("Dias da Semana*", DIAS_SEMANA)
             st.markdown("**Exercícios por Grupo Muscular**")
-            grupos_musculares = {
-                "Peito": ["Supino reto", "Supino inclinado", "Crucifixo", "Flexão", "Crossover"],
-                "Costas": ["Puxada frontal", "Remada curvada", "Pull-down", "Barra fixa", "Pulley"],
-                "Pernas": ["Agachamento", "Leg press", "Cadeira extensora", "Stiff", "Afundo", "Cadeira flexora"],
-                "Ombros": ["Desenvolvimento", "Elevação lateral", "Remada alta", "Face pull", "Elevação frontal"],
-                "Braços": ["Rosca direta", "Tríceps testa", "Rosca martelo", "Tríceps pulley", "Rosca scott"],
-                "Abdômen": ["Abdominal crunch", "Prancha", "Elevação de pernas", "Russian twist", "Abdominal bicicleta"]
-            }
             plano_treino = {}
-            for grupo, exercicios in grupos_musculares.items():
+            for grupo, exercicios in GRUPOS_MUSCULARES.items():
                 if st.checkbox(f"{grupo}"):
                     exercicio_selecionado = st.selectbox(f"Exercício para {grupo}", exercicios, key=f"ex_{grupo}")
                     col1, col2, col3 = st.columns(3)
@@ -990,7 +463,6 @@ class FitnessHub:
                 "exercicios_completos": st.session_state.active_workout["exercicios_completos"]
             }
             save_workout_history(st.session_state.user_id, registro)
-            st.session_state.workout_history.append(registro)
             st.session_state.active_workout = None
             st.session_state.start_time = None
             st.success("Treino finalizado e salvo no histórico!")
@@ -1001,38 +473,34 @@ class FitnessHub:
         col1, col2 = st.columns(2)
         with col1:
             st.markdown("**Adicionar Alimento**")
-            categoria = st.selectbox("Categoria", list(self.food_db.keys()))
-            alimento = st.selectbox("Alimento", list(self.food_db[categoria].keys()))
+            # Busca no catálogo (FTS5): só os melhores resultados vão para a tela
+            busca = st.text_input("Buscar alimento", placeholder="Ex.: frango, arroz, brocolis")
+            resultados = search_foods(busca, limite=15)
+            if not resultados:
+                st.info("Nenhum alimento encontrado para essa busca.")
+            escolhido = st.selectbox("Alimento", range(len(resultados)),
+                                     format_func=lambda i: f"{resultados[i]['nome']} · {resultados[i]['categoria']}")
             col_qtd, col_unid = st.columns(2)
             with col_qtd:
                 quantidade = st.number_input("Quantidade", min_value=1.0, value=100.0, step=1.0, format="%.1f")
             with col_unid:
-                unidade = st.selectbox("Unidade", ["g", "unidades", "colheres", "xícaras"])
-            if st.button("Adicionar à Refeição"):
-                alimento_info = self.food_db[categoria][alimento].copy()
-                alimento_info["nome"] = alimento
-                alimento_info["categoria"] = categoria
+                unidade = st.selectbox("Unidade", UNIDADES)
+            if st.button("Adicionar à Refeição", disabled=not resultados):
+                alimento_info = resultados[escolhido].copy()
                 alimento_info["quantidade"] = quantidade
                 alimento_info["unidade"] = unidade
                 st.session_state.today_food.append(alimento_info)
-                st.success(f"{alimento} adicionado!")
+                st.success(f"{alimento_info['nome']} adicionado!")
         with col2:
             st.markdown("**Sua Refeição de Hoje**")
             if st.session_state.today_food:
-                total_calorias = 0
-                total_proteina = 0
-                total_carboidrato = 0
-                total_gordura = 0
-                for alimento in st.session_state.today_food:
-                    fator = alimento["quantidade"] / 100 if alimento["unidade"] == "g" else alimento["quantidade"]
-                    calorias = alimento["calorias"] * fator
-                    proteina = alimento["proteina"] * fator
-                    carboidrato = alimento["carboidrato"] * fator
-                    gordura = alimento["gordura"] * fator
-                    total_calorias += calorias
-                    total_proteina += proteina
-                    total_carboidrato += carboidrato
-                    total_gordura += gordura
+                # Valores por item e totais da refeição em um único cálculo vetorizado
+                refeicao_atual = st.session_state.today_food
+                valores = get_engine().item_values([a["food_id"] for a in refeicao_atual],
+                                                   [a["unidade"] for a in refeicao_atual],
+                                                   [a["quantidade"] for a in refeicao_atual])
+                total_calorias, total_proteina, total_carboidrato, total_gordura = valores.sum(axis=0).tolist()
+                for alimento, (calorias, proteina, carboidrato, gordura) in zip(refeicao_atual, valores.tolist()):
                     st.markdown(f"""
                     <div class="food-card">
                         <b>{alimento['nome']}</b> - {alimento['quantidade']}{alimento['unidade']}<br>
@@ -1059,76 +527,117 @@ class FitnessHub:
                         }
                     }
                     save_food_log(st.session_state.user_id, refeicao)
-                    st.session_state.food_log.append(refeicao)
                     st.session_state.today_food = []
                     st.success("Refeição salva no histórico!")
             else:
                 st.info("Nenhum alimento adicionado hoje.")
 
+    def nutrition_frame(self, resumo, frequencia="D"):
+        # Totais diários (daily_summary) -> DataFrame indexado por data, reamostrado
+        # por dia ("D"), semana ("W-MON") ou mês ("MS") com a média diária do período
+        colunas = ["calorias", "proteina", "carboidrato", "gordura"]
+        df = pd.DataFrame(resumo, columns=["data"] + colunas)
+        df["data"] = pd.to_datetime(df["data"])
+        df = df.set_index("data").sort_index()
+        # Dias sem refeição (só água/sono/treino) não entram nas médias
+        df = df[(df[colunas] > 0).any(axis=1)]
+        if frequencia != "D":
+            df = df.resample(frequencia, label="left", closed="left").mean().dropna(how="all")
+        return df
+
     def nutrition_dashboard(self):
         st.markdown('<div class="sub-header">📊 Dashboard Nutricional</div>', unsafe_allow_html=True)
-        if not st.session_state.food_log:
+        hoje = datetime.now().date()
+        col1, col2 = st.columns(2)
+        with col1:
+            periodo = st.date_input("Período", (hoje - timedelta(days=29), hoje), max_value=hoje)
+        with col2:
+            agrupamento = st.radio("Agrupar por", ["Dia", "Semana", "Mês"], horizontal=True)
+        if len(periodo) != 2:
+            st.info("Selecione a data final do período.")
+            return
+        # Figuras reaproveitadas entre reruns enquanto período, agrupamento,
+        # meta e dados (versão do daily_summary) não mudarem
+        user_id = st.session_state.user_id
+        tdee = st.session_state.user_data["tdee"] if st.session_state.user_data else None
+        figuras = get_figure(
+            (user_id, "nutricao", periodo, agrupamento, tdee, data_version(user_id, "daily_summary")),
+            lambda: self.nutrition_figures(periodo, agrupamento, tdee))
+        if figuras is None:
             st.info("Nenhum registro alimentar encontrado. Adicione alimentos para ver estatísticas.")
             return
-        dias = []
-        calorias_dia = []
-        proteinas_dia = []
-        carbs_dia = []
-        gorduras_dia = []
-        for registro in st.session_state.food_log[-7:]:
-            dias.append(registro["data"])
-            calorias_dia.append(registro["totais"]["calorias"])
-            proteinas_dia.append(registro["totais"]["proteina"])
-            carbs_dia.append(registro["totais"]["carboidrato"])
-            gorduras_dia.append(registro["totais"]["gordura"])
+        st.plotly_chart(figuras["calorias"], use_container_width=True)
+        for coluna, nutriente in zip(st.columns(3), ["proteina", "carboidrato", "gordura"]):
+            with coluna:
+                st.plotly_chart(figuras[nutriente], use_container_width=True)
+
+    def nutrition_figures(self, periodo, agrupamento, tdee):
+        resumo = load_daily_summary(st.session_state.user_id,
+                                    inicio=periodo[0].strftime("%Y-%m-%d"),
+                                    fim=periodo[1].strftime("%Y-%m-%d"))
+        frequencia = {"Dia": "D", "Semana": "W-MON", "Mês": "MS"}[agrupamento]
+        df = self.nutrition_frame(resumo, frequencia)
+        if df.empty:
+            return None
         fig_cal = go.Figure()
-        fig_cal.add_trace(go.Scatter(x=dias, y=calorias_dia, mode='lines+markers', name='Calorias',
-                                    line=dict(color='#FF6B6B', width=3)))
-        if st.session_state.user_data:
-            tdee = st.session_state.user_data["tdee"]
+        fig_cal.add_trace(line_trace(df.index, df["calorias"], mode='lines+markers', name='Calorias',
+                                     line=dict(color='#FF6B6B', width=3)))
+        if tdee:
             fig_cal.add_hline(y=tdee, line_dash="dash", line_color="green", 
                              annotation_text="Meta Calórica Diária")
-        fig_cal.update_layout(title="Consumo Calórico Diário", xaxis_title="Data", yaxis_title="Calorias")
-        st.plotly_chart(fig_cal, use_container_width=True)
-        col1, col2, col3 = st.columns(3)
-        with col1:
-            fig_prot = go.Figure(go.Indicator(
-                mode="gauge+number",
-                value=np.mean(proteinas_dia) if proteinas_dia else 0,
-                title={'text': "Proteína Média (g)"},
-                gauge={'axis': {'range': [0, 200]}}
-            ))
-            st.plotly_chart(fig_prot, use_container_width=True)
-        with col2:
-            fig_carb = go.Figure(go.Indicator(
-                mode="gauge+number",
-                value=np.mean(carbs_dia) if carbs_dia else 0,
-                title={'text': "Carbs Média (g)"},
-                gauge={'axis': {'range': [0, 400]}}
-            ))
-            st.plotly_chart(fig_carb, use_container_width=True)
-        with col3:
-            fig_fat = go.Figure(go.Indicator(
-                mode="gauge+number",
-                value=np.mean(gorduras_dia) if gorduras_dia else 0,
-                title={'text': "Gorduras Média (g)"},
-                gauge={'axis': {'range': [0, 100]}}
-            ))
-            st.plotly_chart(fig_fat, use_container_width=True)
+        titulo = "Consumo Calórico Diário" if agrupamento == "Dia" else f"Média Calórica Diária por {agrupamento}"
+        fig_cal.update_layout(title=titulo, xaxis_title="Data", yaxis_title="Calorias")
+        medias = df.mean()
+        fig_prot = go.Figure(go.Indicator(
+            mode="gauge+number",
+            value=medias["proteina"],
+            title={'text': "Proteína Média (g)"},
+            gauge={'axis': {'range': [0, 200]}}
+        ))
+        fig_carb = go.Figure(go.Indicator(
+            mode="gauge+number",
+            value=medias["carboidrato"],
+            title={'text': "Carbs Média (g)"},
+            gauge={'axis': {'range': [0, 400]}}
+        ))
+        fig_fat = go.Figure(go.Indicator(
+            mode="gauge+number",
+            value=medias["gordura"],
+            title={'text': "Gorduras Média (g)"},
+            gauge={'axis': {'range': [0, 100]}}
+        ))
+        return {"calorias": fig_cal, "proteina": fig_prot, "carboidrato": fig_carb, "gordura": fig_fat}
 
     def workout_history_view(self):
         st.markdown('<div class="sub-header">📋 Histórico de Treinos</div>', unsafe_allow_html=True)
-        if not st.session_state.workout_history:
+        # history_cursors guarda o cursor de início de cada página já visitada
+        tamanho = st.selectbox("Treinos por página", [10, 25, 50], key="history_page_size",
+                               on_change=lambda: st.session_state.update(history_cursors=[None]))
+        cursors = st.session_state.history_cursors
+        pagina, proximo = load_workout_history_page(st.session_state.user_id, tamanho, cursors[-1])
+        if not pagina:
             st.info("Nenhum treino registrado ainda. Inicie um treino para ver o histórico.")
             return
-        for treino in reversed(st.session_state.workout_history):
-            with st.expander(f"{treino['data']} - {treino['plano']} - {int(treino['duracao']//60)}min"):
-                st.write(f"**Início:** {treino['inicio']}")
-                st.write(f"**Término:** {treino['fim']}")
-                st.write(f"**Duração:** {int(treino['duracao']//60)} minutos")
-                st.write("**Exercícios completos:**")
-                for exercicio in treino['exercicios_completos']:
-                    st.write(f"- {exercicio}")
+        df = pd.DataFrame({
+            "Data": [t["data"] for t in pagina],
+            "Plano": [t["plano"] for t in pagina],
+            "Duração (min)": [int(t["duracao"] // 60) for t in pagina],
+            "Início": [t["inicio"] for t in pagina],
+            "Término": [t["fim"] for t in pagina],
+            "Exercícios completos": [", ".join(t["exercicios_completos"]) for t in pagina],
+        })
+        st.dataframe(df, hide_index=True, use_container_width=True)
+        col1, col2, col3 = st.columns([1, 2, 1])
+        with col1:
+            if st.button("⬅️ Anterior", disabled=len(cursors) == 1):
+                cursors.pop()
+                st.rerun()
+        with col2:
+            st.markdown(f'<div style="text-align: center;">Página {len(cursors)}</div>', unsafe_allow_html=True)
+        with col3:
+            if st.button("Próxima ➡️", disabled=proximo is None):
+                cursors.append(proximo)
+                st.rerun()
 
     def progress_tracking(self):
         st.markdown('<div class="sub-header">📈 Acompanhamento de Progresso</div>', unsafe_allow_html=True)
@@ -1150,29 +659,156 @@ class FitnessHub:
                     "observacoes": observacoes
                 }
                 save_progress_data(st.session_state.user_id, registro)
-                st.session_state.progress_data.append(registro)
+                self.ensure_data("progress_data")
                 st.session_state.user_data["peso"] = peso
                 st.success("Progresso registrado com sucesso!")
+        with st.expander("📥 Importar histórico (planilha ou relógio)"):
+            st.caption("CSV com uma coluna de data e colunas de peso, sono e/ou água. "
+                       "Dias já registrados são mantidos.")
+            arquivo = st.file_uploader("Arquivo CSV", type=["csv", "txt"])
+            if arquivo is not None and st.button("Importar"):
+                try:
+                    resultado, erros = import_history(st.session_state.user_id,
+                                                      io.TextIOWrapper(arquivo, encoding="utf-8-sig", newline=""))
+                except ArquivoInvalido as erro:
+                    st.error(f"Arquivo inválido: {erro}")
+                except UnicodeDecodeError:
+                    st.error("O arquivo não está em UTF-8. Salve o CSV como UTF-8 e tente de novo.")
+                else:
+                    self.ensure_data("progress_data")
+                    nomes = {"progress_data": "pesagens", "water_log": "dias de água", "sleep_log": "dias de sono"}
+                    st.success(" · ".join(f"{inseridos} {nomes[t]} importados ({ignorados} já existentes)"
+                                          for t, (inseridos, ignorados) in resultado.items()))
+                    if erros["total"]:
+                        st.warning(f"{erros['total']} linhas inválidas ignoradas: " + "; ".join(erros["exemplos"]))
         if st.session_state.progress_data:
-            df = pd.DataFrame(st.session_state.progress_data)
-            df['data'] = pd.to_datetime(df['data'])
-            df = df.sort_values('data')
-            fig = go.Figure()
-            fig.add_trace(go.Scatter(x=df['data'], y=df['peso'], 
-                                   mode='lines+markers', name='Peso (kg)',
-                                   line=dict(color='#FF6B6B', width=3)))
-            if st.session_state.user_data.get("meta_peso"):
-                fig.add_hline(y=st.session_state.user_data["meta_peso"], 
-                             line_dash="dash", line_color="green", 
-                             annotation_text="Meta de Peso")
-            fig.update_layout(
-                title="Evolução do Peso",
-                xaxis_title="Data",
-                yaxis_title="Peso (kg)",
-                template="plotly_white"
-            )
+            user_id = st.session_state.user_id
+            meta_peso = st.session_state.user_data.get("meta_peso")
+            # A tendência fica na sessão e só processa as pesagens novas
+            tendencia = st.session_state.weight_trend
+            if tendencia is None or not tendencia.update(st.session_state.progress_data):
+                tendencia = build_trend(st.session_state.progress_data)
+                st.session_state.weight_trend = tendencia
+            resumo = tendencia.summary(meta_peso)
+            if resumo:
+                col1, col2, col3 = st.columns(3)
+                col1.metric("Peso de tendência", f"{resumo['tendencia']:.1f} kg")
+                ritmo = resumo["ritmo_semanal"]
+                col2.metric("Ritmo semanal", "—" if ritmo is None else f"{ritmo:+.2f} kg/sem")
+                previsao = resumo["previsao_meta"]
+                col3.metric("Previsão da meta", previsao.strftime("%d/%m/%Y") if previsao else "—")
+            fig = get_figure(
+                (user_id, "peso", meta_peso, st.session_state.last_seen.get("progress_data"),
+                 data_version(user_id, "progress_data")),
+                lambda: self.weight_figure(st.session_state.progress_data, meta_peso, tendencia, resumo))
             st.plotly_chart(fig, use_container_width=True)
 
+    def weight_figure(self, progresso, meta_peso, tendencia=None, resumo=None):
+        df = pd.DataFrame(progresso)
+        df['data'] = pd.to_datetime(df['data'])
+        df = df.sort_values('data')
+        fig = go.Figure()
+        # Histórico longo: reduzido com LTTB e desenhado em WebGL (charts.line_trace)
+        fig.add_trace(line_trace(df['data'], df['peso'],
+                                 mode='lines+markers', name='Peso (kg)',
+                                 line=dict(color='#FF6B6B', width=3)))
+        if tendencia and tendencia.suavizado:
+            fig.add_trace(line_trace(pd.to_datetime(tendencia.datas), tendencia.suavizado,
+                                     mode='lines', name='Tendência (média móvel)',
+                                     line=dict(color='#1f77b4', width=2)))
+        if resumo and resumo["ajuste"]:
+            # Projeção do ajuste robusto até a meta (ou 30 dias se não houver previsão)
+            ultima, atual, inclinacao = resumo["ajuste"]
+            fim = resumo["previsao_meta"] or ultima + timedelta(days=30)
+            fig.add_trace(go.Scatter(x=[ultima, fim], y=[atual, atual + inclinacao * (fim - ultima).days],
+                                     mode='lines', name='Projeção',
+                                     line=dict(color='#1f77b4', width=2, dash='dot')))
+        if meta_peso:
+            fig.add_hline(y=meta_peso, 
+                         line_dash="dash", line_color="green", 
+                         annotation_text="Meta de Peso")
+        fig.update_layout(
+            title="Evolução do Peso",
+            xaxis_title="Data",
+            yaxis_title="Peso (kg)",
+            template="plotly_white"
+        )
+        return fig
+
+    def data_export(self):
+        st.markdown('<div class="sub-header">📤 Exportar Dados</div>', unsafe_allow_html=True)
+        st.write("Baixe o seu histórico completo, uma tabela por arquivo.")
+        col1, col2 = st.columns(2)
+        with col1:
+            tabela = st.selectbox("Dados", list(EXPORT_QUERIES),
+                                  format_func=lambda t: t.replace("_", " ").capitalize())
+        with col2:
+            formato = st.radio("Formato", list(FORMATOS), horizontal=True,
+                               format_func=lambda f: "CSV" if f == "csv" else "JSON Lines")
+        # O Streamlit mantém o conteúdo em memória até o envio, então
+        # exportações grandes são pela CLI (python export.py)
+        st.download_button(
+            "⬇️ Baixar",
+            data=export_bytes(st.session_state.user_id, tabela, formato),
+            file_name=f"fitbuddy_{tabela}.{formato}",
+            mime=FORMATOS[formato],
+        )
+
+    def gym_analytics(self):
+        st.markdown('<div class="sub-header">🏢 Análise da Academia</div>', unsafe_allow_html=True)
+        if not is_admin(st.session_state.user_email):
+            st.warning("Página restrita aos gestores da academia.")
+            return
+        # Agregados semanais de todos os membros, recalculados em segundo plano
+        analise = get_gym_analytics()
+        col1, col2 = st.columns([3, 1])
+        with col1:
+            st.caption(f"Atualizado em {analise['gerado_em'].strftime('%d/%m/%Y %H:%M')} "
+                       f"(consulta de {analise['duracao_s']:.2f}s)")
+        with col2:
+            if st.button("🔄 Atualizar agora", use_container_width=True):
+                refresh_gym_analytics()
+                st.rerun()
+        df = pd.DataFrame(analise["semanas"])
+        if df.empty or not df["membros"].any():
+            st.info("Nenhum membro cadastrado ainda.")
+            return
+        df["semana"] = pd.to_datetime(df["semana"])
+        df = df.set_index("semana")
+        atual = df.iloc[-1]
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Membros ativos na semana", f"{atual['ativos']:.0f}",
+                    f"{atual['taxa_ativos']:.0%} dos {atual['membros']:.0f} membros")
+        col2.metric("Duração média do treino",
+                    "—" if pd.isna(atual["duracao_media_min"]) else f"{atual['duracao_media_min']:.0f} min")
+        col3.metric("Adesão ao plano", "—" if pd.isna(atual["adesao"]) else f"{atual['adesao']:.0%}")
+        col4.metric("Registram refeições", f"{atual['taxa_registro_refeicoes']:.0%}")
+        st.subheader("Membros ativos por semana")
+        st.bar_chart(df["ativos"])
+        st.subheader("Taxas semanais")
+        st.line_chart(df[["taxa_ativos", "adesao", "taxa_retencao", "taxa_registro_refeicoes"]].rename(columns={
+            "taxa_ativos": "Ativos", "adesao": "Adesão", "taxa_retencao": "Retenção",
+            "taxa_registro_refeicoes": "Registro de refeições"}))
+        st.subheader("Duração média do treino (min)")
+        st.line_chart(df["duracao_media_min"])
+
+        # Instruções SQL mais caras deste processo, com o plano das que foram lentas
+        with st.expander("🐢 Consultas SQL mais caras"):
+            consultas = query_stats(15)
+            if not consultas:
+                st.info("Nenhuma consulta registrada (instrumentação desligada?).")
+            else:
+                st.dataframe(pd.DataFrame([{
+                    "Instrução": c["sql"][:300],
+                    "Chamadas": c["chamadas"],
+                    "Total (ms)": round(c["total_ms"], 1),
+                    "Média (ms)": round(c["media_ms"], 2),
+                    "Máx (ms)": round(c["max_ms"], 1),
+                    "Linhas": c["linhas"],
+                    "Funções": ", ".join(c["funcoes"]),
+                    "Plano": " | ".join(c["plano"] or []),
+                } for c in consultas]), use_container_width=True, hide_index=True)
+
     def dashboard(self):
         st.markdown('<h1 class="main-header">💪 FitBuddy</h1>', unsafe_allow_html=True)
         st.markdown('<p style="text-align: center; font-size: 1.2rem;">Seu Companheiro Fitness Completo</p>', unsafe_allow_html=True)
@@ -1186,6 +822,18 @@ class FitnessHub:
         meta_calorias = self.calculate_calorie_goal(user['tdee'], user['objetivo'])
         meta_treino = self.calculate_min_training_time(user['objetivo'], user['nivel_atividade'])
 
+        # Uma linha por dia do resumo diário, em vez de percorrer os registros brutos;
+        # resumo e treinos recentes são buscados em paralelo
+        hoje = datetime.now().date()
+        dados, tempos = load_concurrently({
+            "resumo": (load_daily_summary, st.session_state.user_id,
+                       (hoje - timedelta(days=30)).strftime("%Y-%m-%d")),
+            "recentes": (load_workout_history_page, st.session_state.user_id, 3),
+        })
+        st.session_state.load_timings.update(tempos)
+        resumo = dados["resumo"]
+        resumo_hoje = resumo[0] if resumo and resumo[0]["data"] == hoje.strftime("%Y-%m-%d") else {}
+
         col1, col2, col3, col4 = st.columns(4)
         with col1:
             st.markdown(f"""
@@ -1200,7 +848,7 @@ class FitnessHub:
             <div class="metric-card">
                 <h3>🔥 Calorias</h3>
                 <h2>{meta_calorias} kcal</h2>
-                <p>Meta diária</p>
+                <p>Meta diária · hoje: {resumo_hoje.get('calorias', 0):.0f} kcal</p>
             </div>
             """, unsafe_allow_html=True)
         with col3:
@@ -1208,7 +856,7 @@ class FitnessHub:
             <div class="metric-card">
                 <h3>💧 Água</h3>
                 <h2>{meta_agua} ml</h2>
-                <p>Meta diária</p>
+                <p>Meta diária · hoje: {resumo_hoje.get('water_ml', 0)} ml</p>
             </div>
             """, unsafe_allow_html=True)
         with col4:
@@ -1216,7 +864,7 @@ class FitnessHub:
             <div class="metric-card">
                 <h3>⏱️ Duração do Treino</h3>
                 <h2>{meta_treino} min</h2>
-                <p>Por sessão</p>
+                <p>Por sessão · hoje: {resumo_hoje.get('treino_minutos', 0):.0f} min</p>
             </div>
             """, unsafe_allow_html=True)
         st.markdown("---")
@@ -1237,8 +885,9 @@ class FitnessHub:
         col1, col2 = st.columns(2)
         with col1:
             st.subheader("📋 Treinos Recentes")
-            if st.session_state.workout_history:
-                for treino in list(reversed(st.session_state.workout_history))[:3]:
+            recentes, _ = dados["recentes"]
+            if recentes:
+                for treino in recentes:
                     data = treino['data']
                     plano = treino['plano']
                     duracao = int(treino['duracao'] // 60)
@@ -1247,11 +896,10 @@ class FitnessHub:
                 st.info("Nenhum treino registrado")
         with col2:
             st.subheader("🍽️ Refeições Recentes")
-            if st.session_state.food_log:
-                for refeicao in list(reversed(st.session_state.food_log))[:3]:
-                    data = refeicao['data']
-                    calorias = refeicao['totais']['calorias']
-                    st.write(f"**{data}**: {calorias:.0f} kcal")
+            dias_com_refeicao = [dia for dia in resumo if dia["calorias"]][:3]
+            if dias_com_refeicao:
+                for dia in dias_com_refeicao:
+                    st.write(f"**{dia['data']}**: {dia['calorias']:.0f} kcal")
             else:
                 st.info("Nenhuma refeição registrada")
         st.markdown("---")
@@ -1260,9 +908,9 @@ class FitnessHub:
         st.markdown("---")
         col1, col2 = st.columns(2)
         with col1:
-            self.water_tracker(meta_agua=meta_agua)
+            self.water_tracker(meta_agua=meta_agua, resumo_hoje=resumo_hoje)
         with col2:
-            self.sleep_tracker()
+            self.sleep_tracker(resumo_hoje=resumo_hoje)
 
     def classify_bmi(self, bmi):
         if bmi < 18.5:
@@ -1275,7 +923,9 @@ class FitnessHub:
             return "Obesidade"
 
     def run(self):
-        # Verifica se o usuário está logado
+        # Verifica se o usuário está logado (ou tem uma sessão salva)
+        if not st.session_state.user_id:
+            self.restore_session()
         if not st.session_state.user_id:
             self.login_section()
             return
@@ -1283,7 +933,15 @@ class FitnessHub:
         # Menu lateral normal após login
         if "selected" not in st.session_state:
             st.session_state.selected = "Dashboard"
-            
+
+        # Carrega os dados do usuário se acabou de fazer login
+        if st.session_state.just_logged_in:
+            self.load_user_data()
+            st.session_state.just_logged_in = False
+
+        # Carrega apenas os dados usados pela página selecionada
+        self.ensure_data("user_data", *PAGE_DATA.get(st.session_state.selected, []))
+
         with st.sidebar:
             st.title("💪 FitBuddy")
             st.markdown(f"**Usuário:** {st.session_state.user_email}")
@@ -1297,8 +955,11 @@ class FitnessHub:
                 "Registrar Refeição": "🍽️",
                 "Dashboard Nutricional": "📈",
                 "Histórico de Treinos": "📋",
-                "Acompanhamento": "🎯"
+                "Acompanhamento": "🎯",
+                "Exportar Dados": "📤"
             }
+            if is_admin(st.session_state.user_email):
+                menu_options["Análise da Academia"] = "🏢"
             
             for option, emoji in menu_options.items():
                 if st.button(f"{emoji} {option}", use_container_width=True, key=f"btn_{option}"):
@@ -1322,11 +983,6 @@ class FitnessHub:
                 
             st.markdown("*FitBuddy - Versão 1.0*<br><span style='font-size:0.9em;color:#888;'>by Guilherme Gama</span>", unsafe_allow_html=True)
 
-        # Carrega os dados do usuário se acabou de fazer login
-        if st.session_state.just_logged_in:
-            self.load_user_data()
-            st.session_state.just_logged_in = False
-
         # Renderiza a página selecionada
         if st.session_state.selected == "Dashboard":
             self.dashboard()
@@ -1345,6 +1001,10 @@ class FitnessHub:
             self.workout_history_view()
         elif st.session_state.selected == "Acompanhamento":
             self.progress_tracking()
+        elif st.session_state.selected == "Exportar Dados":
+            self.data_export()
+        elif st.session_state.selected == "Análise da Academia":
+            self.gym_analytics()
 
 if __name__ == "__main__":
     app = FitnessHub()
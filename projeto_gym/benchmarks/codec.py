@@ -0,0 +1,85 @@
+# Compara o carregamento do food_log no formato antigo (str() + eval()),
+# no formato JSON (migração 3) e normalizado em food_log_items (migração 4).
+#
+# Uso (a partir de projeto_gym/):
+#   python -m benchmarks.codec --linhas 100000
+import argparse
+import json
+import os
+import tempfile
+import time
+
+import database
+
+ALIMENTO = {"calorias": 165, "proteina": 31, "carboidrato": 0, "gordura": 3.6,
+            "nome": "Peito de Frango (100g)", "categoria": "Proteínas",
+            "quantidade": 150.0, "unidade": "g"}
+TOTAIS = {"calorias": 247.5, "proteina": 46.5, "carboidrato": 0.0, "gordura": 5.4}
+
+def load_food_log_legacy(user_id):
+    # Cópia do carregador antigo, só para comparação
+    with database.db_reader() as conn:
+        rows = conn.execute("""
+            SELECT data, alimentos, totais
+            FROM food_log
+            WHERE user_id = ?
+            ORDER BY data DESC
+        """, (user_id,)).fetchall()
+    return [{"data": row[0], "alimentos": eval(row[1]), "totais": eval(row[2])} for row in rows]
+
+def load_food_log_json(user_id):
+    with database.db_reader() as conn:
+        rows = conn.execute("""
+            SELECT data, alimentos, totais
+            FROM food_log
+            WHERE user_id = ?
+            ORDER BY data DESC
+        """, (user_id,)).fetchall()
+    return [{"data": row[0], "alimentos": database.load_blob(row[1], []),
+             "totais": database.load_blob(row[2], {})} for row in rows]
+
+def cronometra(funcao, *args):
+    inicio = time.perf_counter()
+    resultado = funcao(*args)
+    return time.perf_counter() - inicio, resultado
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--linhas", type=int, default=100_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as pasta:
+        database.configure_database(os.path.join(pasta, "bench.db"))
+        # Para antes da migração 3 para gravar linhas no formato antigo
+        database.run_migrations(target_version=2)
+        database.add_user("bench@fitbuddy.com", "bench")
+        user_id = database.login_user("bench@fitbuddy.com", "bench")
+        with database.db_writer() as conn:
+            conn.executemany(
+                "INSERT INTO food_log (user_id, data, alimentos, totais) VALUES (?, ?, ?, ?)",
+                ((user_id, f"2020-01-01+{i}", str([ALIMENTO, ALIMENTO]), str(TOTAIS))
+                 for i in range(args.linhas))
+            )
+
+        t_antigo, antigo = cronometra(load_food_log_legacy, user_id)
+        t_migracao_json, _ = cronometra(database.run_migrations, 3)
+        t_json, via_json = cronometra(load_food_log_json, user_id)
+        assert antigo == via_json
+        t_migracao_itens, _ = cronometra(database.run_migrations)
+        t_itens, normalizado = cronometra(database.load_food_log, user_id)
+        assert len(normalizado) == len(antigo)
+        database.get_pool().close()
+
+    print(json.dumps({
+        "linhas": args.linhas,
+        "load_food_log_eval_s": round(t_antigo, 3),
+        "migracao_json_s": round(t_migracao_json, 3),
+        "load_food_log_json_s": round(t_json, 3),
+        "migracao_itens_s": round(t_migracao_itens, 3),
+        "load_food_log_itens_s": round(t_itens, 3),
+        "ganho_json": round(t_antigo / t_json, 1),
+        "ganho_itens": round(t_antigo / t_itens, 1),
+    }, indent=2))
+
+if __name__ == "__main__":
+    main()
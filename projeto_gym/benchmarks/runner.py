@@ -0,0 +1,213 @@
+# Mede o app em escala: cada load_*/save_* do database.py, login_user e a
+# renderização completa de cada página via streamlit.testing (AppTest), sobre
+# um banco sintético (benchmarks.synthetic). O resultado sai em JSON (mín /
+# mediana / máx em ms) e pode ser comparado com uma execução anterior.
+#
+# Uso (a partir de projeto_gym/):
+#   python -m benchmarks.runner --usuarios 50 --anos 2 --saida atual.json
+#   python -m benchmarks.runner --banco /tmp/bench.db --comparar atual.json
+import argparse
+import json
+import os
+import platform
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+import database
+from benchmarks import synthetic
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+PAGINAS = ["Dashboard", "Cadastro", "Criar Plano de Treino", "Iniciar Treino", "Registrar Refeição",
+           "Dashboard Nutricional", "Histórico de Treinos", "Acompanhamento", "Exportar Dados",
+           "Análise da Academia"]
+TOLERANCIA = 1.25  # mediana 25% acima da referência conta como regressão
+PISO_MS = 1.0      # medidas abaixo disso são ruído e não entram na comparação
+CONSULTAS = 20     # instruções SQL mais caras incluídas no resultado
+
+def medir(func, repeticoes, antes=None):
+    tempos = []
+    for _ in range(repeticoes):
+        if antes:
+            antes()
+        inicio = time.perf_counter()
+        func()
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    return {"min_ms": round(min(tempos), 3), "mediana_ms": round(statistics.median(tempos), 3),
+            "max_ms": round(max(tempos), 3), "repeticoes": repeticoes}
+
+def salva(func, *args):
+    # Com write-behind ligado o save só enfileira; o flush entra na medida
+    def executa():
+        func(*args)
+        database.flush_write_behind()
+    return executa
+
+def bench_funcoes(user_id, email, repeticoes):
+    hoje = date.today()
+    inicio_mes = (hoje - timedelta(days=30)).isoformat()
+    food_id = next(iter(next(iter(database.load_foods().values())).values()))["food_id"]
+    cargas = {
+        "load_user_profile": (database.load_user_profile, user_id),
+        "load_workout_plans": (database.load_workout_plans, user_id),
+        "load_workout_history": (database.load_workout_history, user_id),
+        "load_workout_history_page": (database.load_workout_history_page, user_id),
+        "load_food_log": (database.load_food_log, user_id),
+        "load_food_totals": (database.load_food_totals, user_id, "dia", inicio_mes),
+        "load_progress_data": (database.load_progress_data, user_id),
+        "load_water_log": (database.load_water_log, user_id),
+        "load_sleep_log": (database.load_sleep_log, user_id),
+        "load_daily_summary": (database.load_daily_summary, user_id, inicio_mes),
+        "load_foods": (database.load_foods,),
+        "load_nutrient_catalog": (database.load_nutrient_catalog,),
+        "load_gym_analytics": (database.load_gym_analytics,),
+    }
+    resultados = {}
+    for nome, (func, *args) in cargas.items():
+        chamada = lambda: func(*args)
+        # frio: cache de leitura vazio; quente: repetição com o cache preenchido
+        resultados[nome] = {"frio": medir(chamada, repeticoes, database._read_cache.clear),
+                            "quente": medir(chamada, repeticoes)}
+
+    data = hoje.isoformat()
+    agora = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    perfil = database.load_user_profile(user_id)
+    saves = {
+        "save_user_profile": salva(database.save_user_profile, user_id, perfil),
+        "save_workout_plan": salva(database.save_workout_plan, user_id, "Benchmark", {
+            "dias_semana": ["Segunda", "Quarta"],
+            "exercicios": {"Peito": {"exercicio": "Supino reto", "series": 3, "repeticoes": 12, "descanso": 60}}}),
+        "save_workout_history": salva(database.save_workout_history, user_id, {
+            "plano": "Benchmark", "data": data, "inicio": agora, "fim": agora, "duracao": 3600.0,
+            "exercicios_completos": ["Peito"]}),
+        "save_food_log": salva(database.save_food_log, user_id, {
+            "data": data, "alimentos": [{"food_id": food_id, "quantidade": 150.0, "unidade": "g"}]}),
+        "save_progress_data": salva(database.save_progress_data, user_id, {
+            "data": data, "peso": 75.0, "circunferencia_abdomen": 85, "observacoes": ""}),
+        "save_water_log": salva(database.save_water_log, user_id, {"data": data, "ml": 250}),
+        "save_sleep_log": salva(database.save_sleep_log, user_id, {"data": data, "horas": 7.5}),
+    }
+    for nome, func in saves.items():
+        resultados[nome] = medir(func, repeticoes)
+    resultados["login_user"] = medir(lambda: database.login_user(email, synthetic.SENHA), repeticoes)
+    return resultados
+
+def bench_paginas(user_id, email, repeticoes):
+    # Cada página em um AppTest novo (sessão recém-logada) e depois um rerun
+    from streamlit.testing.v1 import AppTest
+    import analytics
+
+    analytics.ADMINS.add(email)
+    resultados = {}
+    for pagina in PAGINAS:
+        primeira, rerun = [], []
+        for _ in range(repeticoes):
+            at = AppTest.from_file(APP, default_timeout=120)
+            at.session_state.user_id = user_id
+            at.session_state.user_email = email
+            at.session_state.just_logged_in = True
+            at.session_state.selected = pagina
+            for tempos in (primeira, rerun):
+                inicio = time.perf_counter()
+                at.run()
+                tempos.append((time.perf_counter() - inicio) * 1000)
+                if at.exception:
+                    raise SystemExit(f"Erro ao renderizar {pagina}: {at.exception[0].message}")
+        resultados[pagina] = {
+            "primeira": {"min_ms": round(min(primeira), 3), "mediana_ms": round(statistics.median(primeira), 3),
+                         "max_ms": round(max(primeira), 3), "repeticoes": repeticoes},
+            "rerun": {"min_ms": round(min(rerun), 3), "mediana_ms": round(statistics.median(rerun), 3),
+                      "max_ms": round(max(rerun), 3), "repeticoes": repeticoes},
+        }
+    return resultados
+
+def medianas(resultado, prefixo=""):
+    # Achata o JSON em {"funcoes/load_x/frio": mediana_ms}
+    planas = {}
+    for chave, valor in resultado.items():
+        if "mediana_ms" in valor:
+            planas[prefixo + chave] = valor["mediana_ms"]
+        elif isinstance(valor, dict):
+            planas.update(medianas(valor, f"{prefixo}{chave}/"))
+    return planas
+
+def compare(atual, referencia, tolerancia=TOLERANCIA):
+    antes = medianas({"funcoes": referencia["funcoes"], "paginas": referencia.get("paginas", {})})
+    depois = medianas({"funcoes": atual["funcoes"], "paginas": atual.get("paginas", {})})
+    regressoes = {}
+    for chave, tempo in depois.items():
+        if chave in antes and tempo >= PISO_MS and tempo > max(antes[chave], PISO_MS) * tolerancia:
+            regressoes[chave] = {"antes_ms": antes[chave], "depois_ms": tempo,
+                                 "razao": round(tempo / antes[chave], 2)}
+    return regressoes
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do FitnessHub (funções do banco e páginas).")
+    parser.add_argument("--banco", help="banco existente (gerado com benchmarks.synthetic); "
+                                        "se omitido, gera um temporário")
+    parser.add_argument("--usuarios", type=int, default=50)
+    parser.add_argument("--anos", type=float, default=2)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--sem-paginas", action="store_true", help="não renderiza as páginas (AppTest)")
+    parser.add_argument("--saida", help="arquivo JSON de saída (padrão: stdout)")
+    parser.add_argument("--comparar", metavar="REFERENCIA.json",
+                        help="aponta regressões contra uma execução anterior (sai com código 1)")
+    args = parser.parse_args()
+
+    pasta = None
+    if args.banco:
+        banco = args.banco
+        database.configure_database(banco)
+        database.run_migrations()
+        contagem = synthetic.table_counts()
+    else:
+        pasta = tempfile.mkdtemp(prefix="fitnesshub-bench-")
+        banco = os.path.join(pasta, "fitnesshub.db")
+        inicio = time.perf_counter()
+        contagem = synthetic.generate(banco, args.usuarios, args.anos, args.seed)
+        print(f"banco sintético gerado em {time.perf_counter() - inicio:.1f}s: {banco}", file=sys.stderr)
+    os.environ["FITNESSHUB_DB"] = banco  # para o app.py rodado pelo AppTest
+
+    email = synthetic.email(0)
+    user_id = database.login_user(email, synthetic.SENHA)
+    if not user_id:
+        raise SystemExit(f"Erro: {email} não existe em {banco} (gere o banco com benchmarks.synthetic)")
+
+    resultado = {
+        "meta": {"banco": banco, "linhas": contagem, "repeticoes": args.repeticoes,
+                 "python": platform.python_version(), "sqlite": sqlite3.sqlite_version,
+                 "write_behind": database.WRITE_BEHIND_MODO, "data": datetime.now().isoformat(timespec="seconds")},
+        "funcoes": bench_funcoes(user_id, email, args.repeticoes),
+    }
+    if not args.sem_paginas:
+        resultado["paginas"] = bench_paginas(user_id, email, args.repeticoes)
+    # Instruções SQL que mais pesaram na execução inteira (database.query_stats)
+    resultado["consultas"] = database.query_stats(CONSULTAS)
+
+    regressoes = {}
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as arquivo:
+            regressoes = compare(resultado, json.load(arquivo))
+        resultado["regressoes"] = regressoes
+
+    texto = json.dumps(resultado, ensure_ascii=False, indent=2)
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as arquivo:
+            arquivo.write(texto + "\n")
+    else:
+        print(texto)
+    for chave, regressao in regressoes.items():
+        print(f"REGRESSÃO {chave}: {regressao['antes_ms']} -> {regressao['depois_ms']} ms "
+              f"({regressao['razao']}x)", file=sys.stderr)
+    if pasta:
+        shutil.rmtree(pasta, ignore_errors=True)
+    if regressoes:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+# Gera um fitnesshub.db sintético: N usuários x M anos de treinos, refeições,
+# água, sono e pesagens com padrões realistas (3-5 treinos por semana, várias
+# doses de água por dia, peso com tendência e ruído). Grava direto nas tabelas
+# com executemany, um usuário por transação, e recalcula o daily_summary no fim.
+#
+# Uso (a partir de projeto_gym/):
+#   python -m benchmarks.synthetic --usuarios 100 --anos 2 --banco /tmp/bench.db
+import argparse
+import json
+import os
+import random
+import time
+from datetime import date, datetime, timedelta
+
+import database
+
+SENHA = "bench"
+GRUPOS = {
+    "Peito": ["Supino reto", "Supino inclinado", "Crucifixo"],
+    "Costas": ["Puxada frontal", "Remada curvada", "Levantamento terra"],
+    "Pernas": ["Agachamento", "Leg press", "Cadeira extensora"],
+    "Ombros": ["Desenvolvimento", "Elevação lateral"],
+    "Braços": ["Rosca direta", "Tríceps corda"],
+}
+OBJETIVOS = ["Perda de peso", "Ganho de massa muscular", "Manutenção", "Melhora do condicionamento"]
+NIVEIS = ["Sedentário", "Levemente ativo", "Moderadamente ativo", "Muito ativo"]
+UNIDADES = ["g", "g", "g", "unidades", "colheres", "xícaras"]
+
+def email(i):
+    return f"bench{i}@fitbuddy.com"
+
+def gera_usuario(conn, rng, i, inicio, dias, food_ids):
+    cur = conn.execute("INSERT INTO users (email, password, created_at) VALUES (?, ?, ?)",
+                       (email(i), database.make_hashes(SENHA), f"{inicio.isoformat()} 08:00:00"))
+    user_id = cur.lastrowid
+    peso = rng.uniform(55, 110)
+    altura = rng.randint(155, 195)
+    objetivo = rng.choice(OBJETIVOS)
+    tendencia = {"Perda de peso": -0.006, "Ganho de massa muscular": 0.003}.get(objetivo, 0.0)
+    conn.execute("""
+        INSERT INTO user_profiles (user_id, nome, idade, genero, altura, peso, objetivo, nivel_atividade,
+                                   meta_peso, bmi, bmr, tdee, data_cadastro)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, (user_id, f"Membro {i}", rng.randint(18, 65), rng.choice(["Masculino", "Feminino"]), altura, peso,
+          objetivo, rng.choice(NIVEIS), round(peso * (1 + tendencia * 30), 1), peso / (altura / 100) ** 2,
+          1600.0, 2200.0, inicio.isoformat()))
+
+    planos = []
+    for nome in ["A", "B"][:rng.randint(1, 2)]:
+        grupos = rng.sample(list(GRUPOS), 3)
+        exercicios = {g: {"exercicio": rng.choice(GRUPOS[g]), "series": 3, "repeticoes": 12, "descanso": 60}
+                      for g in grupos}
+        dias_semana = rng.sample(["Segunda", "Terça", "Quarta", "Quinta", "Sexta", "Sábado"], rng.randint(3, 5))
+        planos.append((nome, grupos))
+        conn.execute("""
+            INSERT INTO workouts (user_id, plano_nome, dias_semana, exercicios, data_criacao)
+            VALUES (?, ?, ?, ?, ?)
+        """, (user_id, nome, ",".join(dias_semana), json.dumps(exercicios, ensure_ascii=False), inicio.isoformat()))
+
+    treinos, refeicoes, agua, sono, pesagens = [], [], [], [], []
+    for d in range(dias):
+        dia = inicio + timedelta(days=d)
+        data = dia.isoformat()
+        peso += tendencia + rng.gauss(0, 0.05)
+        if rng.random() < 0.55:
+            plano, grupos = rng.choice(planos)
+            comeco = datetime.combine(dia, datetime.min.time()) + timedelta(hours=rng.randint(6, 20))
+            duracao = rng.uniform(35, 90) * 60
+            treinos.append((user_id, plano, data, comeco.strftime("%Y-%m-%d %H:%M:%S"),
+                            (comeco + timedelta(seconds=duracao)).strftime("%Y-%m-%d %H:%M:%S"), duracao,
+                            json.dumps(rng.sample(grupos, rng.randint(1, len(grupos))), ensure_ascii=False)))
+        if rng.random() < 0.7:
+            refeicoes.append((data, [(rng.choice(food_ids), rng.choice(UNIDADES)) for _ in range(rng.randint(3, 8))]))
+        agua.extend((user_id, data, rng.choice([200, 250, 300, 500])) for _ in range(rng.randint(3, 8)))
+        if rng.random() < 0.85:
+            sono.append((user_id, data, round(rng.gauss(7.2, 0.9), 1)))
+        if rng.random() < 0.4:
+            pesagens.append((user_id, data, round(peso + rng.gauss(0, 0.4), 1), rng.randint(70, 110), ""))
+
+    conn.executemany("""
+        INSERT INTO workout_history (user_id, plano, data, inicio, fim, duracao, exercicios_completos)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    """, treinos)
+    itens = []
+    for data, alimentos in refeicoes:
+        food_log_id = conn.execute("INSERT INTO food_log (user_id, data) VALUES (?, ?)", (user_id, data)).lastrowid
+        itens.extend((food_log_id, food_id, rng.uniform(50, 250) if unidade == "g" else rng.randint(1, 3), unidade)
+                     for food_id, unidade in alimentos)
+    conn.executemany("INSERT INTO food_log_items (food_log_id, food_id, quantidade, unidade) VALUES (?, ?, ?, ?)",
+                     itens)
+    conn.executemany("INSERT INTO water_log (user_id, data, ml) VALUES (?, ?, ?)", agua)
+    conn.executemany("INSERT INTO sleep_log (user_id, data, horas) VALUES (?, ?, ?)", sono)
+    conn.executemany("""
+        INSERT INTO progress_data (user_id, data, peso, circunferencia_abdomen, observacoes)
+        VALUES (?, ?, ?, ?, ?)
+    """, pesagens)
+
+def generate(path, usuarios, anos, seed=42, hoje=None):
+    # Cria (ou completa) o banco em `path`; devolve a contagem de linhas por tabela
+    rng = random.Random(seed)
+    database.configure_database(path)
+    database.run_migrations()
+    hoje = hoje or date.today()
+    dias = int(anos * 365)
+    inicio = hoje - timedelta(days=dias - 1)
+    with database.db_reader() as conn:
+        food_ids = [row[0] for row in conn.execute("SELECT id FROM foods")]
+        existentes = conn.execute("SELECT COUNT(*) FROM users WHERE email LIKE 'bench%@fitbuddy.com'").fetchone()[0]
+    for i in range(existentes, usuarios):
+        with database.db_writer() as conn:
+            gera_usuario(conn, rng, i, inicio, dias, food_ids)
+    with database.db_writer() as conn:
+        database.rebuild_daily_summary(conn)
+        conn.execute("ANALYZE")
+    return table_counts()
+
+def table_counts():
+    tabelas = ["users", "workouts", "workout_history", "food_log", "food_log_items",
+               "progress_data", "water_log", "sleep_log", "daily_summary"]
+    with database.db_reader() as conn:
+        return {t: conn.execute(f"SELECT COUNT(*) FROM {t}").fetchone()[0] for t in tabelas}
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera um fitnesshub.db sintético para benchmarks.")
+    parser.add_argument("--usuarios", type=int, default=100)
+    parser.add_argument("--anos", type=float, default=2)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--banco", default="bench.db")
+    args = parser.parse_args()
+
+    if os.path.abspath(args.banco) == os.path.abspath(database.DB_PATH) and os.path.exists(args.banco):
+        raise SystemExit(f"Erro: {args.banco} é o banco da aplicação; use outro arquivo")
+    inicio = time.perf_counter()
+    contagem = generate(args.banco, args.usuarios, args.anos, args.seed)
+    print(json.dumps({"banco": args.banco, "segundos": round(time.perf_counter() - inicio, 1),
+                      "linhas": contagem}, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+# Cache das figuras Plotly dos dashboards e redução das séries longas (LTTB).
+# A chave do cache inclui usuário, tipo do gráfico, parâmetros e a versão dos dados
+# (database.data_version), então uma figura nunca sobrevive a uma gravação.
+import numpy as np
+import plotly.graph_objects as go
+
+from database import ReadCache
+
+FIGURAS_MAX = 64
+
+# Séries longas (anos de pesagens diárias) são reduzidas a PONTOS_GRAFICO pontos
+# com LTTB antes de ir para o navegador; a partir de LIMITE_WEBGL pontos
+# desenhados o traço usa Scattergl (WebGL) em vez de SVG
+PONTOS_GRAFICO = 800
+LIMITE_WEBGL = 500
+
+_figure_cache = ReadCache(max_entradas=FIGURAS_MAX)
+
+def get_figure(chave, construir):
+    # Devolve a figura guardada para a chave ou constrói, guarda e devolve.
+    # As figuras são compartilhadas: quem chamar não deve alterá-las.
+    encontrado, figura = _figure_cache.get(chave)
+    if not encontrado:
+        figura = construir()
+        _figure_cache.put(chave, figura)
+    return figura
+
+def figure_cache_stats():
+    return _figure_cache.stats()
+
+# --- REDUÇÃO DE SÉRIES (LTTB) ---
+def lttb_indices(x, y, pontos):
+    # Largest-Triangle-Three-Buckets: mantém o primeiro e o último ponto e, em
+    # cada faixa intermediária, o ponto que forma o maior triângulo com o ponto
+    # escolhido na faixa anterior e a média da próxima. Preserva picos e a forma.
+    n = len(y)
+    if pontos >= n or pontos < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    bordas = np.linspace(1, n - 1, pontos - 1).astype(np.int64)
+    indices = np.empty(pontos, dtype=np.int64)
+    indices[0], indices[-1] = 0, n - 1
+    anterior = 0
+    for i in range(pontos - 2):
+        inicio, fim = bordas[i], bordas[i + 1]
+        if i == pontos - 3:
+            media_x, media_y = x[-1], y[-1]
+        else:
+            media_x = x[fim:bordas[i + 2]].mean()
+            media_y = y[fim:bordas[i + 2]].mean()
+        areas = np.abs((x[anterior] - media_x) * (y[inicio:fim] - y[anterior])
+                       - (x[anterior] - x[inicio:fim]) * (media_y - y[anterior]))
+        anterior = inicio + int(np.argmax(areas))
+        indices[i + 1] = anterior
+    return indices
+
+def line_trace(x, y, pontos=PONTOS_GRAFICO, **propriedades):
+    # Traço de linha com no máximo `pontos` pontos; x pode ser datas
+    x = np.asarray(x)
+    y = np.asarray(y, dtype=np.float64)
+    eixo = x.astype("datetime64[ns]").astype(np.int64) if np.issubdtype(x.dtype, np.datetime64) else x
+    indices = lttb_indices(eixo, y, pontos)
+    x, y = x[indices], y[indices]
+    tipo = go.Scattergl if len(indices) >= LIMITE_WEBGL else go.Scatter
+    return tipo(x=x, y=y, **propriedades)
@@ -0,0 +1,2047 @@
+import ast
+import atexit
+import functools
+import hashlib
+import json
+import os
+import queue
+import re
+import secrets
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+DB_PATH = os.environ.get("FITNESSHUB_DB", "fitnesshub.db")
+
+# --- CONFIGURAÇÃO DE AUTENTICAÇÃO ---
+def make_hashes(password):
+    return hashlib.sha256(str.encode(password)).hexdigest()
+
+def check_hashes(password, hashed_text):
+    return make_hashes(password) == hashed_text
+
+# --- POOL DE CONEXÕES SQLITE ---
+# Pragmas aplicados em toda conexão nova. Com WAL os leitores não bloqueiam
+# atrás do escritor, e synchronous=NORMAL é seguro nesse modo.
+PRAGMAS = {
+    "busy_timeout": 5000,
+    "synchronous": "NORMAL",
+    "cache_size": -16000,  # ~16 MB por conexão
+    "temp_store": "MEMORY",
+    "mmap_size": 64 * 1024 * 1024,
+}
+
+# --- INSTRUMENTAÇÃO DAS CONSULTAS ---
+# Toda conexão do pool é uma InstrumentedConnection, então cada instrução SQL
+# passa por InstrumentedCursor: tempo (execução + leitura das linhas), linhas
+# devolvidas (ou afetadas) e a função que a chamou ficam agregados por
+# instrução. As que passam de SQL_LENTO_MS vão para o log de consultas lentas
+# com o EXPLAIN QUERY PLAN, onde aparecem os SCAN de tabela inteira.
+SQL_STATS = os.environ.get("FITNESSHUB_SQL_STATS", "on") != "off"
+SQL_LENTO_MS = float(os.environ.get("FITNESSHUB_SQL_LENTO_MS", "100"))
+SQL_LOG = os.environ.get("FITNESSHUB_SQL_LOG", "slow_queries.log")  # "-" para stderr
+SQL_RECENTES = 200
+ITERACAO_LOTE = 256
+PLANO_INSTRUCOES = ("select", "with", "insert", "update", "delete", "replace")
+
+@functools.lru_cache(maxsize=1024)
+def _normaliza_sql(sql):
+    return " ".join(sql.split())
+
+class QueryStats:
+    def __init__(self, recentes=SQL_RECENTES):
+        self._instrucoes = {}
+        self.recentes = deque(maxlen=recentes)  # (sql, ms, linhas, função)
+        self.lentas = 0
+        self._lock = threading.Lock()
+
+    def record(self, sql, ms, linhas, funcao, plano=None):
+        with self._lock:
+            item = self._instrucoes.get(sql)
+            if item is None:
+                item = self._instrucoes[sql] = {"sql": sql, "chamadas": 0, "total_ms": 0.0, "max_ms": 0.0,
+                                                "linhas": 0, "funcoes": set(), "plano": None}
+            item["chamadas"] += 1
+            item["total_ms"] += ms
+            item["max_ms"] = max(item["max_ms"], ms)
+            item["linhas"] += linhas
+            item["funcoes"].add(funcao)
+            if plano is not None:
+                item["plano"] = plano
+                self.lentas += 1
+            self.recentes.append((sql, ms, linhas, funcao))
+
+    def snapshot(self, limite=None):
+        # Instruções ordenadas pelo tempo total, a mais cara primeiro
+        with self._lock:
+            itens = [dict(item, funcoes=sorted(item["funcoes"]), media_ms=item["total_ms"] / item["chamadas"])
+                     for item in self._instrucoes.values()]
+        itens.sort(key=lambda item: item["total_ms"], reverse=True)
+        return itens[:limite]
+
+    def clear(self):
+        with self._lock:
+            self._instrucoes.clear()
+            self.recentes.clear()
+            self.lentas = 0
+
+_query_stats = QueryStats()
+_slow_log_lock = threading.Lock()
+
+def explain_query_plan(conn, sql, parametros=()):
+    # Plano em árvore, uma linha por nó (ex.: "SCAN water_log")
+    if parametros is None or not sql.lstrip().lower().startswith(PLANO_INSTRUCOES):
+        return []
+    try:
+        linhas = sqlite3.Cursor(conn).execute("EXPLAIN QUERY PLAN " + sql, parametros).fetchall()
+    except sqlite3.Error:
+        return []
+    niveis = {}
+    plano = []
+    for no, pai, _, detalhe in linhas:
+        niveis[no] = niveis.get(pai, -1) + 1
+        plano.append("  " * niveis[no] + detalhe)
+    return plano
+
+def _grava_consulta_lenta(sql, ms, linhas, funcao, plano):
+    texto = "\n".join([f"# {datetime.now().isoformat(timespec='seconds')} {ms:.1f} ms, {linhas} linhas, {funcao}",
+                       sql + ";"] + [f"--   {no}" for no in plano]) + "\n\n"
+    with _slow_log_lock:
+        if SQL_LOG == "-":
+            sys.stderr.write(texto)
+            return
+        with open(SQL_LOG, "a", encoding="utf-8") as arquivo:
+            arquivo.write(texto)
+
+def _registra_consulta(conn, sql, parametros, funcao, ms, linhas):
+    texto = _normaliza_sql(sql)
+    plano = None
+    if ms >= SQL_LENTO_MS:
+        plano = explain_query_plan(conn, sql, parametros)
+        try:
+            _grava_consulta_lenta(texto, ms, linhas, funcao, plano)
+        except OSError as erro:
+            print(f"slow-query log: falha ao gravar: {erro}", file=sys.stderr)
+    _query_stats.record(texto, ms, linhas, funcao, plano)
+
+def _chamador():
+    frame = sys._getframe(1)
+    while frame is not None and frame.f_code in _CODIGOS_INTERNOS:
+        frame = frame.f_back
+    if frame is None:
+        return "?"
+    return f"{frame.f_globals.get('__name__', '?')}.{frame.f_code.co_name}"
+
+class InstrumentedCursor(sqlite3.Cursor):
+    # Um SELECT só termina quando as linhas acabam de ser lidas (ou o cursor é
+    # fechado/descartado); o registro acumula o tempo de cada fetch até lá
+    _registro = None  # [sql, parâmetros, função, ms, linhas]
+
+    def execute(self, sql, parametros=()):
+        self._finaliza()
+        inicio = time.perf_counter()
+        super().execute(sql, parametros)
+        self._inicia(sql, parametros, inicio)
+        return self
+
+    def executemany(self, sql, sequencia):
+        self._finaliza()
+        # Para o EXPLAIN basta o primeiro conjunto de parâmetros
+        primeiro = sequencia[0] if isinstance(sequencia, (list, tuple)) and sequencia else None
+        inicio = time.perf_counter()
+        super().executemany(sql, sequencia)
+        self._inicia(sql, primeiro, inicio)
+        return self
+
+    def fetchone(self):
+        inicio = time.perf_counter()
+        linha = super().fetchone()
+        self._conta(inicio, linha is not None, linha is None)
+        return linha
+
+    def fetchmany(self, size=None):
+        inicio = time.perf_counter()
+        linhas = super().fetchmany(self.arraysize if size is None else size)
+        self._conta(inicio, len(linhas), not linhas)
+        return linhas
+
+    def fetchall(self):
+        inicio = time.perf_counter()
+        linhas = super().fetchall()
+        self._conta(inicio, len(linhas), True)
+        return linhas
+
+    def __iter__(self):
+        # Laços "for linha in cursor" leem em lotes: medir linha a linha custaria
+        # mais do que a própria leitura em consultas de milhares de linhas
+        while True:
+            linhas = self.fetchmany(ITERACAO_LOTE)
+            if not linhas:
+                return
+            yield from linhas
+
+    def __next__(self):
+        inicio = time.perf_counter()
+        try:
+            linha = super().__next__()
+        except StopIteration:
+            self._conta(inicio, 0, True)
+            raise
+        self._conta(inicio, 1, False)
+        return linha
+
+    def close(self):
+        self._finaliza()
+        super().close()
+
+    def __del__(self):
+        self._finaliza()
+
+    def _inicia(self, sql, parametros, inicio):
+        self._registro = [sql, parametros, _chamador(), (time.perf_counter() - inicio) * 1000, 0]
+        if self.description is None:  # INSERT/UPDATE/DDL: já terminou
+            self._registro[4] = max(self.rowcount, 0)
+            self._finaliza()
+
+    def _conta(self, inicio, linhas, fim):
+        registro = self._registro
+        if registro is not None:
+            registro[3] += (time.perf_counter() - inicio) * 1000
+            registro[4] += linhas
+            if fim:
+                self._finaliza()
+
+    def _finaliza(self):
+        registro, self._registro = self._registro, None
+        if registro is not None:
+            _registra_consulta(self.connection, *registro)
+
+class InstrumentedConnection(sqlite3.Connection):
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parametros=()):
+        return self.cursor().execute(sql, parametros)
+
+    def executemany(self, sql, sequencia):
+        return self.cursor().executemany(sql, sequencia)
+
+_CODIGOS_INTERNOS = {
+    InstrumentedCursor.execute.__code__, InstrumentedCursor.executemany.__code__,
+    InstrumentedCursor._inicia.__code__, InstrumentedConnection.execute.__code__,
+    InstrumentedConnection.executemany.__code__,
+}
+
+def query_stats(limite=None):
+    return _query_stats.snapshot(limite)
+
+def reset_query_stats():
+    _query_stats.clear()
+
+def configure_slow_log(limite_ms=None, caminho=None):
+    # Troca o limite (ms) e/ou o arquivo do log de consultas lentas
+    global SQL_LENTO_MS, SQL_LOG
+    if limite_ms is not None:
+        SQL_LENTO_MS = float(limite_ms)
+    if caminho is not None:
+        SQL_LOG = caminho
+
+class ConnectionPool:
+    # Um único escritor (SQLite só aceita uma escrita por vez) e até
+    # `max_readers` leitores reaproveitados entre os reruns do Streamlit.
+    def __init__(self, path, max_readers=4, timeout=5.0):
+        self.path = path
+        self.max_readers = max_readers
+        self.timeout = timeout
+        self._writer = None
+        self._writer_lock = threading.Lock()
+        self._readers = queue.LifoQueue(maxsize=max_readers)
+        self._all_readers = []
+        self._readers_lock = threading.Lock()
+
+    def _connect(self, readonly=False):
+        conn = sqlite3.connect(self.path, timeout=self.timeout, check_same_thread=False,
+                               factory=InstrumentedConnection if SQL_STATS else sqlite3.Connection)
+        conn.execute("PRAGMA journal_mode=WAL")
+        for pragma, value in PRAGMAS.items():
+            conn.execute(f"PRAGMA {pragma}={value}")
+        if readonly:
+            conn.execute("PRAGMA query_only=ON")
+        return conn
+
+    def _acquire_reader(self):
+        try:
+            return self._readers.get_nowait()
+        except queue.Empty:
+            pass
+        with self._readers_lock:
+            if len(self._all_readers) < self.max_readers:
+                conn = self._connect(readonly=True)
+                self._all_readers.append(conn)
+                return conn
+        # Pool cheio: espera algum leitor ser devolvido
+        return self._readers.get(timeout=self.timeout)
+
+    @contextmanager
+    def reader(self):
+        conn = self._acquire_reader()
+        try:
+            yield conn
+        finally:
+            self._readers.put(conn)
+
+    @contextmanager
+    def writer(self):
+        with self._writer_lock:
+            if self._writer is None:
+                self._writer = self._connect()
+            try:
+                yield self._writer
+                self._writer.commit()
+            except BaseException:
+                self._writer.rollback()
+                raise
+
+    def close(self):
+        with self._writer_lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+        with self._readers_lock:
+            for conn in self._all_readers:
+                conn.close()
+            self._all_readers = []
+            self._readers = queue.LifoQueue(maxsize=self.max_readers)
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(DB_PATH)
+    return _pool
+
+def configure_database(path, max_readers=4):
+    # Troca o arquivo do banco (ex.: bancos de teste ou benchmark)
+    global _pool, DB_PATH
+    with _pool_lock:
+        # Linhas ainda na fila de escrita vão para o banco atual antes da troca;
+        # o flush usa o pool antigo, então ele só fecha depois
+        flush_write_behind()
+        if _pool is not None:
+            _pool.close()
+        DB_PATH = path
+        _pool = ConnectionPool(path, max_readers=max_readers)
+        _esquemas_prontos.discard(path)  # pode ser outro arquivo no mesmo caminho
+    _read_cache.clear()
+    return _pool
+
+def db_reader():
+    return get_pool().reader()
+
+def db_writer():
+    return get_pool().writer()
+
+atexit.register(lambda: _pool is not None and _pool.close())
+
+# --- CARGA CONCORRENTE ---
+# Várias consultas independentes (ex.: dados de uma página) rodam em paralelo,
+# uma thread por conexão de leitura do pool; o tempo total fica próximo da
+# consulta mais lenta, não da soma
+_executor = None
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        with _pool_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=get_pool().max_readers,
+                                               thread_name_prefix="db-reader")
+    return _executor
+
+def _cronometra(funcao, args):
+    inicio = time.perf_counter()
+    resultado = funcao(*args)
+    return resultado, (time.perf_counter() - inicio) * 1000
+
+def load_concurrently(tarefas):
+    # tarefas: {nome: (funcao, *args)} -> ({nome: resultado}, {nome: tempo em ms})
+    if len(tarefas) <= 1:
+        execucoes = {nome: _cronometra(t[0], t[1:]) for nome, t in tarefas.items()}
+    else:
+        futuros = {nome: get_executor().submit(_cronometra, t[0], t[1:]) for nome, t in tarefas.items()}
+        execucoes = {nome: futuro.result() for nome, futuro in futuros.items()}
+    return ({nome: r for nome, (r, _) in execucoes.items()},
+            {nome: ms for nome, (_, ms) in execucoes.items()})
+
+atexit.register(lambda: _executor is not None and _executor.shutdown(wait=True))
+
+# --- CACHE DE LEITURA POR USUÁRIO ---
+# Resultados dos load_* ficam em memória, com chave (user_id, função, versões
+# das tabelas lidas, argumentos). Cada save_*/delete_* incrementa a versão das
+# tabelas que altera para aquele usuário, então uma entrada antiga nunca mais
+# é encontrada e sai pelo LRU. Tabelas compartilhadas (catálogo foods) têm
+# uma única versão, com user_id None.
+# O app.py é reexecutado a cada rerun do Streamlit, mas os módulos que ele
+# importa carregam uma vez por processo: por isso este cache, o de figuras
+# (charts), o motor de nutrientes (nutrition) e os recursos estáticos
+# (resources) ficam em módulos, não no script.
+CACHE_MAX_ENTRADAS = 512
+TABELAS_GLOBAIS = {"foods"}
+
+class ReadCache:
+    def __init__(self, max_entradas=CACHE_MAX_ENTRADAS):
+        self.max_entradas = max_entradas
+        self._entradas = OrderedDict()
+        self._versoes = {}
+        self._epoca = 0  # muda a cada clear(): caches derivados também ficam inválidos
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def versions(self, user_id, tabelas):
+        with self._lock:
+            return (self._epoca,) + tuple(self._versoes.get((None if t in TABELAS_GLOBAIS else user_id, t), 0)
+                                          for t in tabelas)
+
+    def bump(self, user_id, *tabelas):
+        with self._lock:
+            for tabela in tabelas:
+                chave = (user_id, tabela)
+                self._versoes[chave] = self._versoes.get(chave, 0) + 1
+
+    def get(self, chave):
+        with self._lock:
+            if chave in self._entradas:
+                self._entradas.move_to_end(chave)
+                self.hits += 1
+                return True, self._entradas[chave]
+            self.misses += 1
+            return False, None
+
+    def put(self, chave, valor):
+        with self._lock:
+            self._entradas[chave] = valor
+            self._entradas.move_to_end(chave)
+            while len(self._entradas) > self.max_entradas:
+                self._entradas.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entradas.clear()
+            self._versoes.clear()
+            self._epoca += 1
+            self.hits = self.misses = 0
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entradas)
+
+    def stats(self):
+        with self._lock:
+            return {"entradas": len(self._entradas), "hits": self.hits, "misses": self.misses}
+
+_read_cache = ReadCache()
+
+def cached_read(*tabelas):
+    # Para load_*(user_id, ...): devolve uma cópia, então quem alterar o
+    # resultado (ex.: st.session_state) não altera o que está no cache
+    def decorator(funcao):
+        @functools.wraps(funcao)
+        def wrapper(user_id, *args, **kwargs):
+            chave = (user_id, funcao.__name__, _read_cache.versions(user_id, tabelas),
+                     args, tuple(sorted(kwargs.items())))
+            encontrado, valor = _read_cache.get(chave)
+            if not encontrado:
+                valor = funcao(user_id, *args, **kwargs)
+                _read_cache.put(chave, valor)
+            return _copia(valor)
+        return wrapper
+    return decorator
+
+def _copia(valor):
+    # Cópia profunda só de dict/list/tuple (os load_* devolvem dados tipo JSON,
+    # às vezes em tuplas, ex.: (página, cursor)); bem mais barata que copy.deepcopy
+    if isinstance(valor, dict):
+        return {k: _copia(v) if isinstance(v, (dict, list, tuple)) else v for k, v in valor.items()}
+    if isinstance(valor, list):
+        return [_copia(v) if isinstance(v, (dict, list, tuple)) else v for v in valor]
+    if isinstance(valor, tuple):
+        return tuple(_copia(v) if isinstance(v, (dict, list, tuple)) else v for v in valor)
+    return valor
+
+def invalidates(*tabelas):
+    # Para save_*/delete_*(user_id, ...): incrementa as versões depois do
+    # commit, para nenhum leitor guardar dados antigos com a versão nova
+    def decorator(funcao):
+        @functools.wraps(funcao)
+        def wrapper(user_id, *args, **kwargs):
+            try:
+                return funcao(user_id, *args, **kwargs)
+            finally:
+                _read_cache.bump(user_id, *tabelas)
+        return wrapper
+    return decorator
+
+def data_version(user_id, *tabelas):
+    # Versão atual das tabelas para o usuário (chave de caches derivados, ex.: gráficos)
+    return _read_cache.versions(user_id, tabelas)
+
+def read_cache_stats():
+    return _read_cache.stats()
+
+# --- SERIALIZAÇÃO DAS COLUNAS ESTRUTURADAS ---
+# exercicios, exercicios_completos, alimentos e totais são gravados em JSON.
+# Registros antigos usavam str() + eval(); literal_eval só aceita literais.
+def dump_blob(value):
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+def load_blob(text, default):
+    if not text:
+        return default
+    try:
+        return json.loads(text)
+    except ValueError:
+        return ast.literal_eval(text)
+
+# --- CATÁLOGO DE ALIMENTOS ---
+# Carga inicial da tabela foods (valores por porção indicada no nome)
+DEFAULT_FOODS = {
+    "Proteínas": {
+        "Peito de Frango (100g)": {"calorias": 165, "proteina": 31, "carboidrato": 0, "gordura": 3.6},
+        "Ovo (1 unidade)": {"calorias": 78, "proteina": 6, "carboidrato": 0.6, "gordura": 5},
+        "Salmão (100g)": {"calorias": 208, "proteina": 20, "carboidrato": 0, "gordura": 13},
+        "Carne Bovina (100g)": {"calorias": 250, "proteina": 26, "carboidrato": 0, "gordura": 15},
+        "Whey Protein (30g)": {"calorias": 120, "proteina": 24, "carboidrato": 3, "gordura": 1},
+        "Iogurte Grego (100g)": {"calorias": 59, "proteina": 10, "carboidrato": 3.6, "gordura": 0.4},
+        "Queijo Cottage (100g)": {"calorias": 98, "proteina": 11, "carboidrato": 3.4, "gordura": 4.3},
+    },
+    "Carboidratos": {
+        "Arroz Integral (100g cozido)": {"calorias": 112, "proteina": 2.6, "carboidrato": 23, "gordura": 0.9},
+        "Batata Doce (100g)": {"calorias": 86, "proteina": 1.6, "carboidrato": 20, "gordura": 0.1},
+        "Aveia (100g)": {"calorias": 389, "proteina": 16.9, "carboidrato": 66, "gordura": 6.9},
+        "Pão Integral (1 fatia)": {"calorias": 69, "proteina": 3.5, "carboidrato": 11, "gordura": 0.9},
+        "Massa Integral (100g cozido)": {"calorias": 124, "proteina": 5, "carboidrato": 25, "gordura": 1},
+        "Quinoa (100g cozido)": {"calorias": 120, "proteina": 4.4, "carboidrato": 21, "gordura": 1.9},
+        "Banana (1 unidade)": {"calorias": 105, "proteina": 1.3, "carboidrato": 27, "gordura": 0.4},
+    },
+    "Gorduras": {
+        "Abacate (100g)": {"calorias": 160, "proteina": 2, "carboidrato": 9, "gordura": 15},
+        "Azeite de Oliva (1 colher)": {"calorias": 119, "proteina": 0, "carboidrato": 0, "gordura": 14},
+        "Castanhas (30g)": {"calorias": 180, "proteina": 5, "carboidrato": 6, "gordura": 16},
+        "Manteiga de Amendoim (1 colher)": {"calorias": 96, "proteina": 4, "carboidrato": 3, "gordura": 8},
+        "Semente de Chia (20g)": {"calorias": 97, "proteina": 3, "carboidrato": 8, "gordura": 6},
+        "Coco (100g)": {"calorias": 354, "proteina": 3.3, "carboidrato": 15, "gordura": 33},
+        "Azeitonas (100g)": {"calorias": 115, "proteina": 0.8, "carboidrato": 6, "gordura": 11},
+    },
+    "Vegetais": {
+        "Brócolis (100g)": {"calorias": 34, "proteina": 2.8, "carboidrato": 7, "gordura": 0.4},
+        "Espinafre (100g)": {"calorias": 23, "proteina": 2.9, "carboidrato": 3.6, "gordura": 0.4},
+        "Cenoura (100g)": {"calorias": 41, "proteina": 0.9, "carboidrato": 10, "gordura": 0.2},
+        "Alface (100g)": {"calorias": 15, "proteina": 1.4, "carboidrato": 2.9, "gordura": 0.2},
+        "Tomate (100g)": {"calorias": 18, "proteina": 0.9, "carboidrato": 3.9, "gordura": 0.2},
+        "Pepino (100g)": {"calorias": 15, "proteina": 0.7, "carboidrato": 3.6, "gordura": 0.1},
+        "Pimentão (100g)": {"calorias": 31, "proteina": 1, "carboidrato": 6, "gordura": 0.3},
+    }
+}
+
+# Medidas caseiras de cada alimento em gramas (tabelas de medidas caseiras/TACO,
+# valores aproximados). "porcao" preenche o peso das porções contadas no nome
+# ("1 unidade", "1 colher"); None = medida sem peso conhecido para o alimento.
+UNIDADES_MEDIDA = {"unidades": "gramas_unidade", "colheres": "gramas_colher", "xícaras": "gramas_xicara"}
+MEDIDAS_CASEIRAS = {
+    # nome: (porcao, unidade, colher, xícara)
+    "Peito de Frango (100g)": (None, 120, 25, 140),
+    "Ovo (1 unidade)": (50, 50, 20, None),
+    "Salmão (100g)": (None, 150, None, None),
+    "Carne Bovina (100g)": (None, 100, 25, 150),
+    "Whey Protein (30g)": (None, 30, 10, None),
+    "Iogurte Grego (100g)": (None, 100, 20, 240),
+    "Queijo Cottage (100g)": (None, None, 30, 225),
+    "Arroz Integral (100g cozido)": (None, None, 25, 160),
+    "Batata Doce (100g)": (None, 150, 40, 130),
+    "Aveia (100g)": (None, None, 15, 80),
+    "Pão Integral (1 fatia)": (25, 25, None, None),
+    "Massa Integral (100g cozido)": (None, None, 25, 140),
+    "Quinoa (100g cozido)": (None, None, 20, 185),
+    "Banana (1 unidade)": (90, 90, None, 150),
+    "Abacate (100g)": (None, 400, 30, 150),
+    "Azeite de Oliva (1 colher)": (13, None, 13, 216),
+    "Castanhas (30g)": (None, 4, 10, 140),
+    "Manteiga de Amendoim (1 colher)": (15, None, 15, 258),
+    "Semente de Chia (20g)": (None, None, 10, 160),
+    "Coco (100g)": (None, None, 8, 80),
+    "Azeitonas (100g)": (None, 4, 15, 135),
+    "Brócolis (100g)": (None, None, 15, 90),
+    "Espinafre (100g)": (None, None, None, 30),
+    "Cenoura (100g)": (None, 80, 12, 110),
+    "Alface (100g)": (None, 10, None, 40),
+    "Tomate (100g)": (None, 120, None, 180),
+    "Pepino (100g)": (None, 200, None, 120),
+    "Pimentão (100g)": (None, 150, None, 150),
+}
+
+# --- MIGRAÇÕES DE ESQUEMA ---
+# Cada migração roda uma única vez, em ordem, dentro da sua própria transação.
+# A versão aplicada fica registrada na tabela schema_version.
+def _migration_001_tabelas_iniciais(conn):
+    # Tabela de usuários (autenticação)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            email TEXT UNIQUE NOT NULL,
+            password TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+    # Tabela de perfis de usuário
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS user_profiles (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            nome TEXT,
+            idade INTEGER,
+            genero TEXT,
+            altura INTEGER,
+            peso REAL,
+            objetivo TEXT,
+            nivel_atividade TEXT,
+            meta_peso REAL,
+            bmi REAL,
+            bmr REAL,
+            tdee REAL,
+            data_cadastro TEXT,
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )
+    """)
+
+    # Tabela de treinos
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS workouts (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            plano_nome TEXT,
+            dias_semana TEXT,
+            exercicios TEXT,
+            data_criacao TEXT,
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )
+    """)
+
+    # Tabela de histórico de treinos
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS workout_history (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            plano TEXT,
+            data TEXT,
+            inicio TEXT,
+            fim TEXT,
+            duracao REAL,
+            exercicios_completos TEXT,
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )
+    """)
+
+    # Tabela de registro alimentar
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS food_log (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            data TEXT,
+            alimentos TEXT,
+            totais TEXT,
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )
+    """)
+
+    # Tabela de progresso
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS progress_data (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            data TEXT,
+            peso REAL,
+            circunferencia_abdomen INTEGER,
+            observacoes TEXT,
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )
+    """)
+
+    # Tabela de água
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS water_log (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            data TEXT,
+            ml INTEGER,
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )
+    """)
+
+    # Tabela de sono
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS sleep_log (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            data TEXT,
+            horas REAL,
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )
+    """)
+
+def _migration_002_indices_por_usuario(conn):
+    # Índices compostos para as consultas "WHERE user_id = ? ORDER BY data DESC"
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_user_profiles_user ON user_profiles (user_id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_workouts_user ON workouts (user_id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_workout_history_user_data ON workout_history (user_id, data, inicio)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_food_log_user_data ON food_log (user_id, data)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_progress_data_user_data ON progress_data (user_id, data)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_water_log_user_data ON water_log (user_id, data)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_sleep_log_user_data ON sleep_log (user_id, data)")
+    conn.execute("ANALYZE")
+
+def _migration_003_blobs_json(conn):
+    # Converte, uma única vez, as colunas gravadas com str() para JSON
+    colunas = [
+        ("workouts", ["exercicios"]),
+        ("workout_history", ["exercicios_completos"]),
+        ("food_log", ["alimentos", "totais"]),
+    ]
+    for tabela, campos in colunas:
+        cur = conn.execute(f"SELECT id, {', '.join(campos)} FROM {tabela}")
+        while True:
+            rows = cur.fetchmany(5000)
+            if not rows:
+                break
+            conn.executemany(
+                f"UPDATE {tabela} SET {', '.join(f'{c} = ?' for c in campos)} WHERE id = ?",
+                [tuple(dump_blob(load_blob(v, None)) if v else v for v in row[1:]) + (row[0],)
+                 for row in rows]
+            )
+
+def _migration_004_food_log_items(conn):
+    # Catálogo de alimentos + itens de cada refeição referenciando o catálogo
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS foods (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nome TEXT UNIQUE NOT NULL,
+            categoria TEXT,
+            calorias REAL,
+            proteina REAL,
+            carboidrato REAL,
+            gordura REAL
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS food_log_items (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            food_log_id INTEGER NOT NULL,
+            food_id INTEGER NOT NULL,
+            quantidade REAL,
+            unidade TEXT,
+            FOREIGN KEY (food_log_id) REFERENCES food_log (id),
+            FOREIGN KEY (food_id) REFERENCES foods (id)
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_food_log_items_log ON food_log_items (food_log_id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_food_log_items_food ON food_log_items (food_id)")
+    conn.executemany("""
+        INSERT OR IGNORE INTO foods (nome, categoria, calorias, proteina, carboidrato, gordura)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """, [(nome, categoria, info["calorias"], info["proteina"], info["carboidrato"], info["gordura"])
+          for categoria, alimentos in DEFAULT_FOODS.items()
+          for nome, info in alimentos.items()])
+
+    # Move os alimentos gravados no JSON de cada refeição para food_log_items.
+    # Alimentos fora do catálogo entram em foods com os valores do registro.
+    food_ids = dict(conn.execute("SELECT nome, id FROM foods"))
+    rows = conn.execute("SELECT id, alimentos FROM food_log WHERE alimentos IS NOT NULL").fetchall()
+    for food_log_id, alimentos in rows:
+        itens = []
+        for alimento in load_blob(alimentos, []):
+            if alimento["nome"] not in food_ids:
+                cur = conn.execute("""
+                    INSERT INTO foods (nome, categoria, calorias, proteina, carboidrato, gordura)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                """, (alimento["nome"], alimento.get("categoria"), alimento["calorias"],
+                      alimento["proteina"], alimento["carboidrato"], alimento["gordura"]))
+                food_ids[alimento["nome"]] = cur.lastrowid
+            itens.append((food_log_id, food_ids[alimento["nome"]],
+                          alimento["quantidade"], alimento["unidade"]))
+        conn.executemany("""
+            INSERT INTO food_log_items (food_log_id, food_id, quantidade, unidade)
+            VALUES (?, ?, ?, ?)
+        """, itens)
+    conn.execute("UPDATE food_log SET alimentos = NULL, totais = NULL")
+
+def _migration_005_indices_delta(conn):
+    # (user_id, id) permite buscar só as linhas novas de um usuário (id > último visto)
+    for tabela in ["workout_history", "food_log", "progress_data", "water_log", "sleep_log"]:
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{tabela}_user_id ON {tabela} (user_id, id)")
+
+def _migration_006_daily_summary(conn):
+    # Resumo diário por usuário, mantido pelos save_* na mesma transação
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS daily_summary (
+            user_id INTEGER NOT NULL,
+            data TEXT NOT NULL,
+            water_ml INTEGER NOT NULL DEFAULT 0,
+            sleep_horas REAL,
+            calorias REAL NOT NULL DEFAULT 0,
+            proteina REAL NOT NULL DEFAULT 0,
+            carboidrato REAL NOT NULL DEFAULT 0,
+            gordura REAL NOT NULL DEFAULT 0,
+            treinos INTEGER NOT NULL DEFAULT 0,
+            treino_minutos REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (user_id, data),
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        ) WITHOUT ROWID
+    """)
+    # Preenche a partir dos registros já existentes
+    # ("WHERE true" evita a ambiguidade do parser entre SELECT e ON CONFLICT)
+    conn.execute("""
+        INSERT INTO daily_summary (user_id, data, water_ml)
+        SELECT user_id, data, SUM(ml) FROM water_log WHERE true GROUP BY user_id, data
+        ON CONFLICT (user_id, data) DO UPDATE SET water_ml = excluded.water_ml
+    """)
+    conn.execute("""
+        INSERT INTO daily_summary (user_id, data, sleep_horas)
+        SELECT user_id, data, horas FROM (
+            SELECT user_id, data, horas, MAX(id) FROM sleep_log GROUP BY user_id, data
+        ) WHERE true
+        ON CONFLICT (user_id, data) DO UPDATE SET sleep_horas = excluded.sleep_horas
+    """)
+    conn.execute(f"""
+        INSERT INTO daily_summary (user_id, data, calorias, proteina, carboidrato, gordura)
+        SELECT fl.user_id, fl.data, {totais_sql(FATOR_SQL_V1)}
+        FROM food_log fl
+        JOIN food_log_items i ON i.food_log_id = fl.id
+        JOIN foods f ON f.id = i.food_id
+        WHERE true
+        GROUP BY fl.user_id, fl.data
+        ON CONFLICT (user_id, data) DO UPDATE SET
+            calorias = excluded.calorias, proteina = excluded.proteina,
+            carboidrato = excluded.carboidrato, gordura = excluded.gordura
+    """)
+    conn.execute("""
+        INSERT INTO daily_summary (user_id, data, treinos, treino_minutos)
+        SELECT user_id, data, COUNT(*), COALESCE(SUM(duracao), 0) / 60.0
+        FROM workout_history WHERE true GROUP BY user_id, data
+        ON CONFLICT (user_id, data) DO UPDATE SET
+            treinos = excluded.treinos, treino_minutos = excluded.treino_minutos
+    """)
+
+def _migration_007_foods_fts(conn):
+    # Índice FTS5 externo sobre foods; remove_diacritics faz "brocolis" achar "Brócolis"
+    conn.execute("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS foods_fts USING fts5(
+            nome, categoria,
+            content='foods', content_rowid='id',
+            tokenize="unicode61 remove_diacritics 2",
+            prefix='2 3'
+        )
+    """)
+    # Triggers mantêm o índice em dia com inserts/updates/deletes no catálogo
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS foods_fts_ai AFTER INSERT ON foods BEGIN
+            INSERT INTO foods_fts (rowid, nome, categoria) VALUES (new.id, new.nome, new.categoria);
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS foods_fts_ad AFTER DELETE ON foods BEGIN
+            INSERT INTO foods_fts (foods_fts, rowid, nome, categoria)
+            VALUES ('delete', old.id, old.nome, old.categoria);
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS foods_fts_au AFTER UPDATE ON foods BEGIN
+            INSERT INTO foods_fts (foods_fts, rowid, nome, categoria)
+            VALUES ('delete', old.id, old.nome, old.categoria);
+            INSERT INTO foods_fts (rowid, nome, categoria) VALUES (new.id, new.nome, new.categoria);
+        END
+    """)
+    conn.execute("INSERT INTO foods_fts (foods_fts) VALUES ('rebuild')")
+
+def _migration_008_food_nutrients(conn):
+    # Origem dos alimentos importados (fonte + código na tabela de origem, chave
+    # do upsert na reimportação) e todos os nutrientes, um por linha
+    conn.execute("ALTER TABLE foods ADD COLUMN fonte TEXT")
+    conn.execute("ALTER TABLE foods ADD COLUMN codigo TEXT")
+    conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_foods_fonte_codigo ON foods (fonte, codigo)")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS food_nutrients (
+            food_id INTEGER NOT NULL,
+            nutriente TEXT NOT NULL,
+            valor REAL NOT NULL,
+            unidade TEXT,
+            PRIMARY KEY (food_id, nutriente),
+            FOREIGN KEY (food_id) REFERENCES foods (id)
+        ) WITHOUT ROWID
+    """)
+
+def porcao_em_gramas(nome):
+    # "Whey Protein (30g)" -> 30.0; "Ovo (1 unidade)" -> None
+    encontrado = re.search(r"\((\d+(?:[.,]\d+)?)\s*g\b", nome)
+    return float(encontrado.group(1).replace(",", ".")) if encontrado else None
+
+def _migration_009_porcao_em_gramas(conn):
+    # Peso em gramas da porção cadastrada: "g" passa a ser relativo à porção
+    # (30g de whey = 1 porção), não sempre a 100g
+    conn.execute("ALTER TABLE foods ADD COLUMN gramas_porcao REAL")
+    conn.execute("UPDATE foods SET gramas_porcao = 100 WHERE fonte IS NOT NULL")
+    conn.executemany("UPDATE foods SET gramas_porcao = ? WHERE id = ?", [
+        (porcao_em_gramas(nome), food_id)
+        for food_id, nome in conn.execute("SELECT id, nome FROM foods WHERE fonte IS NULL").fetchall()
+    ])
+    # Versão do catálogo, incrementada a cada alteração em foods (usada pelo
+    # motor de nutrientes para saber quando recarregar a matriz)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS catalog_version (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            versao INTEGER NOT NULL
+        )
+    """)
+    conn.execute("INSERT OR IGNORE INTO catalog_version (id, versao) VALUES (1, 0)")
+    for evento in ["INSERT", "UPDATE", "DELETE"]:
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS foods_version_{evento.lower()} AFTER {evento} ON foods BEGIN
+                UPDATE catalog_version SET versao = versao + 1 WHERE id = 1;
+            END
+        """)
+    # Recalcula os totais alimentares do resumo diário com o novo fator
+    _recalcula_totais_alimentares(conn, FATOR_SQL_V2)
+
+def _recalcula_totais_alimentares(conn, fator, food_ids=None):
+    # Sem food_ids recalcula todos os dias; com eles, só os dias que têm algum
+    # desses alimentos (o dia inteiro, com os demais itens)
+    filtro, params = "true", []
+    if food_ids is not None:
+        filtro = f"""(fl.user_id, fl.data) IN (
+            SELECT d.user_id, d.data FROM food_log d
+            JOIN food_log_items di ON di.food_log_id = d.id
+            WHERE di.food_id IN ({', '.join('?' * len(food_ids))}))"""
+        params = list(food_ids)
+    conn.execute(f"""
+        INSERT INTO daily_summary (user_id, data, calorias, proteina, carboidrato, gordura)
+        SELECT fl.user_id, fl.data, {totais_sql(fator)}
+        FROM food_log fl
+        JOIN food_log_items i ON i.food_log_id = fl.id
+        JOIN foods f ON f.id = i.food_id
+        WHERE {filtro}
+        GROUP BY fl.user_id, fl.data
+        ON CONFLICT (user_id, data) DO UPDATE SET
+            calorias = excluded.calorias, proteina = excluded.proteina,
+            carboidrato = excluded.carboidrato, gordura = excluded.gordura
+    """, params)
+
+def _migration_010_sessions(conn):
+    # Sessões persistentes: o navegador guarda só o token; o banco guarda o hash.
+    # WITHOUT ROWID: retomar a sessão é uma única busca pela chave primária.
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS sessions (
+            token_hash TEXT PRIMARY KEY,
+            user_id INTEGER NOT NULL,
+            criada_em TEXT NOT NULL,
+            expira_em TEXT NOT NULL,
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        ) WITHOUT ROWID
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_expira_em ON sessions (expira_em)")
+
+def _migration_011_indices_analise(conn):
+    # Índices por data (cobrindo as colunas usadas) para os agregados da
+    # academia inteira, que filtram por período e não por usuário
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_workout_history_data ON workout_history (data, user_id, duracao)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_food_log_data ON food_log (data, user_id)")
+    conn.execute("ANALYZE")
+
+def _migration_012_indice_paginacao_historico(conn):
+    # (data, inicio) não é único e inicio pode ser NULL: a paginação por chave
+    # usa (data, IFNULL(inicio, ''), id), e o índice acompanha a mesma expressão
+    conn.execute("DROP INDEX IF EXISTS idx_workout_history_user_data")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_workout_history_user_pagina ON workout_history "
+                 "(user_id, data, IFNULL(inicio, ''), id)")
+
+def _migration_013_medidas_caseiras(conn):
+    # Peso em gramas de uma unidade / colher / xícara de cada alimento: "2
+    # xícaras" de arroz passam a valer 2 x 160g, não 2 porções. Medidas sem
+    # peso (NULL, ex.: alimentos importados) continuam multiplicando a porção.
+    for coluna in UNIDADES_MEDIDA.values():
+        conn.execute(f"ALTER TABLE foods ADD COLUMN {coluna} REAL")
+    conn.executemany("""
+        UPDATE foods SET gramas_porcao = COALESCE(?, gramas_porcao), gramas_unidade = ?,
+                         gramas_colher = ?, gramas_xicara = ?
+        WHERE nome = ? AND fonte IS NULL
+    """, [medidas + (nome,) for nome, medidas in MEDIDAS_CASEIRAS.items()])
+    _recalcula_totais_alimentares(conn, FATOR_SQL)
+
+MIGRATIONS = [
+    (1, "tabelas iniciais", _migration_001_tabelas_iniciais),
+    (2, "índices (user_id, data) nas tabelas de registro", _migration_002_indices_por_usuario),
+    (3, "colunas estruturadas em JSON", _migration_003_blobs_json),
+    (4, "catálogo foods e tabela food_log_items", _migration_004_food_log_items),
+    (5, "índices (user_id, id) para sincronização incremental", _migration_005_indices_delta),
+    (6, "tabela daily_summary", _migration_006_daily_summary),
+    (7, "busca textual (FTS5) no catálogo foods", _migration_007_foods_fts),
+    (8, "origem dos alimentos e tabela food_nutrients", _migration_008_food_nutrients),
+    (9, "porção em gramas e versão do catálogo", _migration_009_porcao_em_gramas),
+    (10, "tabela sessions", _migration_010_sessions),
+    (11, "índices por data para a análise da academia", _migration_011_indices_analise),
+    (12, "índice de paginação do histórico com desempate por id", _migration_012_indice_paginacao_historico),
+    (13, "medidas caseiras em gramas por alimento", _migration_013_medidas_caseiras),
+]
+
+def get_schema_version(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            descricao TEXT,
+            aplicada_em TEXT
+        )
+    """)
+    return conn.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version").fetchone()[0]
+
+def run_migrations(target_version=None):
+    # Bancos antigos (sem schema_version) também passam pela migração 1,
+    # que só usa CREATE TABLE IF NOT EXISTS
+    aplicadas = []
+    for version, descricao, migration in MIGRATIONS:
+        if target_version is not None and version > target_version:
+            break
+        with db_writer() as conn:
+            # BEGIN IMMEDIATE trava a escrita: outro processo migrando espera aqui
+            conn.execute("BEGIN IMMEDIATE")
+            if version <= get_schema_version(conn):
+                continue
+            migration(conn)
+            conn.execute("INSERT INTO schema_version (version, descricao, aplicada_em) VALUES (?, ?, ?)",
+                         (version, descricao, datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
+        aplicadas.append(version)
+    return aplicadas
+
+# Uma verificação do esquema por processo e por arquivo de banco, em vez de uma
+# por rerun do Streamlit
+_esquemas_prontos = set()
+_esquema_lock = threading.Lock()
+
+def ensure_schema():
+    if DB_PATH in _esquemas_prontos:
+        return []
+    with _esquema_lock:
+        if DB_PATH in _esquemas_prontos:
+            return []
+        aplicadas = run_migrations()
+        _esquemas_prontos.add(DB_PATH)
+    return aplicadas
+
+# --- SINCRONIZAÇÃO INCREMENTAL ---
+# load_progress_data aceita after_id (a página Acompanhamento sincroniza as
+# pesagens a cada rerun): com ele só retorna as linhas com id maior (as que a
+# sessão ainda não viu), via índice (user_id, id).
+# Nesse caso a ordem também passa a ser por id: com "ORDER BY data" o SQLite
+# prefere o índice (user_id, data) e testa o id em todo o histórico do membro.
+# A sessão reordena as linhas novas ao juntá-las (merge_synced).
+def delta_filter(after_id, ordem):
+    if after_id:
+        return "AND id > ?", [after_id], "id"
+    return "", [], ordem
+
+# --- RESUMO DIÁRIO ---
+# Atualizado dentro da transação de cada save_*. Os valores são somados ao dia,
+# exceto as horas de sono, em que vale o último registro.
+def update_daily_summary(conn, user_id, data, **valores):
+    colunas = list(valores)
+    atualizacoes = ", ".join(
+        f"{c} = excluded.{c}" if c == "sleep_horas" else f"{c} = {c} + excluded.{c}"
+        for c in colunas
+    )
+    conn.execute(f"""
+        INSERT INTO daily_summary (user_id, data, {', '.join(colunas)})
+        VALUES (?, ?, {', '.join('?' * len(colunas))})
+        ON CONFLICT (user_id, data) DO UPDATE SET {atualizacoes}
+    """, [user_id, data] + list(valores.values()))
+
+def rebuild_daily_summary(conn):
+    # Recalcula o resumo inteiro a partir dos registros (cargas em massa que
+    # gravam direto nas tabelas, ex.: benchmarks.synthetic)
+    conn.execute("DELETE FROM daily_summary")
+    conn.execute("""
+        INSERT INTO daily_summary (user_id, data, water_ml)
+        SELECT user_id, data, SUM(ml) FROM water_log GROUP BY user_id, data
+    """)
+    conn.execute("""
+        INSERT INTO daily_summary (user_id, data, sleep_horas)
+        SELECT user_id, data, horas FROM (
+            SELECT user_id, data, horas, MAX(id) FROM sleep_log GROUP BY user_id, data
+        ) WHERE true
+        ON CONFLICT (user_id, data) DO UPDATE SET sleep_horas = excluded.sleep_horas
+    """)
+    conn.execute(f"""
+        INSERT INTO daily_summary (user_id, data, calorias, proteina, carboidrato, gordura)
+        SELECT fl.user_id, fl.data, {TOTAIS_SQL}
+        FROM food_log fl
+        JOIN food_log_items i ON i.food_log_id = fl.id
+        JOIN foods f ON f.id = i.food_id
+        WHERE true
+        GROUP BY fl.user_id, fl.data
+        ON CONFLICT (user_id, data) DO UPDATE SET
+            calorias = excluded.calorias, proteina = excluded.proteina,
+            carboidrato = excluded.carboidrato, gordura = excluded.gordura
+    """)
+    conn.execute("""
+        INSERT INTO daily_summary (user_id, data, treinos, treino_minutos)
+        SELECT user_id, data, COUNT(*), COALESCE(SUM(duracao), 0) / 60.0
+        FROM workout_history WHERE true GROUP BY user_id, data
+        ON CONFLICT (user_id, data) DO UPDATE SET
+            treinos = excluded.treinos, treino_minutos = excluded.treino_minutos
+    """)
+    _read_cache.clear()
+
+@cached_read("daily_summary")
+def load_daily_summary(user_id, inicio=None, fim=None):
+    filtros, params = ["user_id = ?"], [user_id]
+    if inicio:
+        filtros.append("data >= ?")
+        params.append(inicio)
+    if fim:
+        filtros.append("data <= ?")
+        params.append(fim)
+    with db_reader() as conn:
+        rows = conn.execute(f"""
+            SELECT data, water_ml, sleep_horas, calorias, proteina, carboidrato,
+                   gordura, treinos, treino_minutos
+            FROM daily_summary
+            WHERE {' AND '.join(filtros)}
+            ORDER BY data DESC
+        """, params).fetchall()
+
+    keys = ["data", "water_ml", "sleep_horas", "calorias", "proteina", "carboidrato",
+            "gordura", "treinos", "treino_minutos"]
+    return [dict(zip(keys, row)) for row in rows]
+
+# --- FUNÇÕES DE AUTENTICAÇÃO ---
+def add_user(email, password):
+    with db_writer() as conn:
+        conn.execute("INSERT INTO users (email, password) VALUES (?, ?)",
+                     (email, make_hashes(password)))
+
+def login_user(email, password):
+    with db_reader() as conn:
+        data = conn.execute("SELECT * FROM users WHERE email = ?", (email,)).fetchone()
+
+    if data and check_hashes(password, data[2]):
+        return data[0]  # Retorna o user_id
+    return False
+
+# --- SESSÕES PERSISTENTES ---
+SESSAO_DIAS = 30
+
+def create_session(user_id, dias=SESSAO_DIAS):
+    token = secrets.token_urlsafe(32)
+    agora = datetime.now()
+    with db_writer() as conn:
+        # Aproveita o login para descartar sessões vencidas
+        conn.execute("DELETE FROM sessions WHERE expira_em <= ?", (agora.strftime("%Y-%m-%d %H:%M:%S"),))
+        conn.execute("INSERT INTO sessions (token_hash, user_id, criada_em, expira_em) VALUES (?, ?, ?, ?)",
+                     (make_hashes(token), user_id, agora.strftime("%Y-%m-%d %H:%M:%S"),
+                      (agora + timedelta(days=dias)).strftime("%Y-%m-%d %H:%M:%S")))
+    return token
+
+def resume_session(token):
+    # Retorna (user_id, email) se o token for válido e não tiver expirado
+    with db_reader() as conn:
+        row = conn.execute("""
+            SELECT s.user_id, u.email
+            FROM sessions s
+            JOIN users u ON u.id = s.user_id
+            WHERE s.token_hash = ? AND s.expira_em > ?
+        """, (make_hashes(token), datetime.now().strftime("%Y-%m-%d %H:%M:%S"))).fetchone()
+    return row
+
+def delete_session(token):
+    with db_writer() as conn:
+        conn.execute("DELETE FROM sessions WHERE token_hash = ?", (make_hashes(token),))
+
+def get_user_email(user_id):
+    with db_reader() as conn:
+        data = conn.execute("SELECT email FROM users WHERE id = ?", (user_id,)).fetchone()
+    return data[0] if data else None
+
+# --- FUNÇÕES DE PERFIL DO USUÁRIO ---
+@invalidates("user_profiles")
+def save_user_profile(user_id, user_data):
+    with db_writer() as conn:
+        cur = conn.cursor()
+
+        # Verifica se já existe um perfil para este usuário
+        cur.execute("SELECT id FROM user_profiles WHERE user_id = ?", (user_id,))
+        existing_profile = cur.fetchone()
+
+        if existing_profile:
+            # Atualiza o perfil existente
+            cur.execute("""
+                UPDATE user_profiles
+                SET nome=?, idade=?, genero=?, altura=?, peso=?, objetivo=?,
+                    nivel_atividade=?, meta_peso=?, bmi=?, bmr=?, tdee=?, data_cadastro=?
+                WHERE user_id=?
+            """, (
+                user_data["nome"], user_data["idade"], user_data["genero"], user_data["altura"],
+                user_data["peso"], user_data["objetivo"], user_data["nivel_atividade"],
+                user_data["meta_peso"], user_data["bmi"], user_data["bmr"], user_data["tdee"],
+                user_data["data_cadastro"], user_id
+            ))
+        else:
+            # Insere um novo perfil
+            cur.execute("""
+                INSERT INTO user_profiles
+                (user_id, nome, idade, genero, altura, peso, objetivo, nivel_atividade,
+                 meta_peso, bmi, bmr, tdee, data_cadastro)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (
+                user_id, user_data["nome"], user_data["idade"], user_data["genero"],
+                user_data["altura"], user_data["peso"], user_data["objetivo"],
+                user_data["nivel_atividade"], user_data["meta_peso"], user_data["bmi"],
+                user_data["bmr"], user_data["tdee"], user_data["data_cadastro"]
+            ))
+
+@cached_read("user_profiles")
+def load_user_profile(user_id):
+    with db_reader() as conn:
+        row = conn.execute("""
+            SELECT nome, idade, genero, altura, peso, objetivo, nivel_atividade,
+                   meta_peso, bmi, bmr, tdee, data_cadastro
+            FROM user_profiles
+            WHERE user_id = ?
+        """, (user_id,)).fetchone()
+
+    if row:
+        keys = ["nome", "idade", "genero", "altura", "peso", "objetivo",
+                "nivel_atividade", "meta_peso", "bmi", "bmr", "tdee", "data_cadastro"]
+        return dict(zip(keys, row))
+    return None
+
+@invalidates("user_profiles")
+def delete_user_profile(user_id):
+    with db_writer() as conn:
+        conn.execute("DELETE FROM user_profiles WHERE user_id = ?", (user_id,))
+
+# --- FUNÇÕES PARA DADOS DO USUÁRIO ---
+@invalidates("workouts")
+def save_workout_plan(user_id, plan_name, plan_data):
+    with db_writer() as conn:
+        conn.execute("""
+            INSERT INTO workouts (user_id, plano_nome, dias_semana, exercicios, data_criacao)
+            VALUES (?, ?, ?, ?, ?)
+        """, (user_id, plan_name,
+              ','.join(plan_data["dias_semana"]),
+              dump_blob(plan_data["exercicios"]),
+              datetime.now().strftime("%Y-%m-%d")))
+
+@cached_read("workouts")
+def load_workout_plans(user_id):
+    with db_reader() as conn:
+        rows = conn.execute("SELECT plano_nome, dias_semana, exercicios FROM workouts WHERE user_id = ?",
+                            (user_id,)).fetchall()
+
+    plans = {}
+    for row in rows:
+        plans[row[0]] = {
+            "dias_semana": row[1].split(','),
+            "exercicios": load_blob(row[2], {}),
+            "data_criacao": row[3] if len(row) > 3 else ""
+        }
+    return plans
+
+@invalidates("workout_history", "daily_summary")
+def save_workout_history(user_id, workout_data):
+    with db_writer() as conn:
+        conn.execute("""
+            INSERT INTO workout_history
+            (user_id, plano, data, inicio, fim, duracao, exercicios_completos)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, (
+            user_id, workout_data["plano"], workout_data["data"],
+            workout_data["inicio"], workout_data["fim"], workout_data["duracao"],
+            dump_blob(workout_data["exercicios_completos"])
+        ))
+        update_daily_summary(conn, user_id, workout_data["data"],
+                             treinos=1, treino_minutos=workout_data["duracao"] / 60)
+
+# Mesma expressão do índice idx_workout_history_user_pagina (migração 12)
+HISTORICO_ORDEM = "data DESC, IFNULL(inicio, '') DESC, id DESC"
+
+@cached_read("workout_history")
+def load_workout_history(user_id):
+    with db_reader() as conn:
+        rows = conn.execute(f"""
+            SELECT id, plano, data, inicio, fim, duracao, exercicios_completos
+            FROM workout_history
+            WHERE user_id = ?
+            ORDER BY {HISTORICO_ORDEM}
+        """, (user_id,)).fetchall()
+
+    history = []
+    for row in rows:
+        history.append({
+            "id": row[0],
+            "plano": row[1],
+            "data": row[2],
+            "inicio": row[3],
+            "fim": row[4],
+            "duracao": row[5],
+            "exercicios_completos": load_blob(row[6], [])
+        })
+    return history
+
+@cached_read("workout_history")
+def load_workout_history_page(user_id, limite=20, cursor=None):
+    # Paginação por chave (data, inicio, id): cada página é uma busca no índice
+    # idx_workout_history_user_pagina, sem OFFSET. O id desempata treinos com a
+    # mesma data e início. Retorna (página, próximo cursor).
+    filtro, params = "", [user_id]
+    if cursor:
+        filtro = "AND (data, IFNULL(inicio, ''), id) < (?, ?, ?)"
+        params.extend(cursor)
+    with db_reader() as conn:
+        rows = conn.execute(f"""
+            SELECT id, plano, data, inicio, fim, duracao, exercicios_completos
+            FROM workout_history
+            WHERE user_id = ? {filtro}
+            ORDER BY {HISTORICO_ORDEM}
+            LIMIT ?
+        """, params + [limite + 1]).fetchall()
+
+    page = [{
+        "id": row[0],
+        "plano": row[1],
+        "data": row[2],
+        "inicio": row[3],
+        "fim": row[4],
+        "duracao": row[5],
+        "exercicios_completos": load_blob(row[6], [])
+    } for row in rows[:limite]]
+    ultimo = page[-1] if len(rows) > limite else None
+    next_cursor = (ultimo["data"], ultimo["inicio"] or "", ultimo["id"]) if ultimo else None
+    return page, next_cursor
+
+# Fator aplicado aos valores do catálogo (porções): gramas são relativos ao
+# peso da porção cadastrada (100g quando desconhecido); unidades, colheres e
+# xícaras usam o peso da medida do alimento (migração 13) e, sem ele,
+# multiplicam a porção. A mesma regra está em nutrition.NutrientEngine.
+_PORCAO_SQL = "COALESCE(f.gramas_porcao, 100.0)"
+FATOR_SQL = ("(CASE i.unidade WHEN 'g' THEN i.quantidade / " + _PORCAO_SQL
+             + "".join(f" WHEN '{unidade}' THEN i.quantidade * COALESCE(f.{coluna} / {_PORCAO_SQL}, 1.0)"
+                       for unidade, coluna in UNIDADES_MEDIDA.items())
+             + " ELSE i.quantidade END)")
+
+# Regra anterior à migração 9 (gramas sempre relativos a 100g)
+FATOR_SQL_V1 = "(CASE WHEN i.unidade = 'g' THEN i.quantidade / 100.0 ELSE i.quantidade END)"
+
+# Regra das migrações 9 a 12 (só gramas convertidos)
+FATOR_SQL_V2 = "(CASE WHEN i.unidade = 'g' THEN i.quantidade / COALESCE(f.gramas_porcao, 100.0) ELSE i.quantidade END)"
+
+def totais_sql(fator):
+    return f"""
+    COALESCE(SUM(f.calorias * {fator}), 0),
+    COALESCE(SUM(f.proteina * {fator}), 0),
+    COALESCE(SUM(f.carboidrato * {fator}), 0),
+    COALESCE(SUM(f.gordura * {fator}), 0)
+"""
+
+TOTAIS_SQL = totais_sql(FATOR_SQL)
+
+def get_catalog_version():
+    with db_reader() as conn:
+        return conn.execute("SELECT versao FROM catalog_version WHERE id = 1").fetchone()[0]
+
+def load_nutrient_catalog():
+    # Catálogo inteiro para a matriz do motor de nutrientes, com a versão lida
+    # na mesma conexão (mesmo snapshot)
+    with db_reader() as conn:
+        versao = conn.execute("SELECT versao FROM catalog_version WHERE id = 1").fetchone()[0]
+        rows = conn.execute("""
+            SELECT id, gramas_porcao, gramas_unidade, gramas_colher, gramas_xicara,
+                   calorias, proteina, carboidrato, gordura
+            FROM foods
+            ORDER BY id
+        """).fetchall()
+    return versao, rows
+
+def load_foods():
+    with db_reader() as conn:
+        rows = conn.execute("""
+            SELECT id, nome, categoria, calorias, proteina, carboidrato, gordura
+            FROM foods
+            ORDER BY id
+        """).fetchall()
+
+    foods = {}
+    for row in rows:
+        foods.setdefault(row[2], {})[row[1]] = {
+            "food_id": row[0],
+            "calorias": row[3],
+            "proteina": row[4],
+            "carboidrato": row[5],
+            "gordura": row[6]
+        }
+    return foods
+
+def search_foods(termo, limite=10):
+    # Busca por prefixo de cada palavra digitada ("frang pei" -> Peito de Frango),
+    # ordenada pela relevância (bm25). Sem termo, lista os primeiros do catálogo.
+    palavras = re.findall(r"\w+", termo or "")
+    with db_reader() as conn:
+        if palavras:
+            consulta = " ".join(f'"{palavra}"*' for palavra in palavras)
+            rows = conn.execute("""
+                SELECT f.id, f.nome, f.categoria, f.calorias, f.proteina, f.carboidrato, f.gordura
+                FROM foods_fts
+                JOIN foods f ON f.id = foods_fts.rowid
+                WHERE foods_fts MATCH ?
+                ORDER BY foods_fts.rank
+                LIMIT ?
+            """, (consulta, limite)).fetchall()
+        else:
+            rows = conn.execute("""
+                SELECT id, nome, categoria, calorias, proteina, carboidrato, gordura
+                FROM foods
+                ORDER BY id
+                LIMIT ?
+            """, (limite,)).fetchall()
+
+    keys = ["food_id", "nome", "categoria", "calorias", "proteina", "carboidrato", "gordura"]
+    return [dict(zip(keys, row)) for row in rows]
+
+def upsert_foods(alimentos, fonte):
+    # Grava um lote de alimentos importados em uma única transação.
+    # Reimportar a mesma fonte atualiza os alimentos pelo (fonte, codigo);
+    # alimentos cujo nome já pertence a outro alimento são ignorados, tanto
+    # na inserção quanto na atualização (nome novo de um código já importado).
+    # Dias registrados com um alimento cujos macros mudaram têm os totais do
+    # daily_summary recalculados na mesma transação.
+    codigos = [a["codigo"] for a in alimentos]
+    with db_writer() as conn:
+        consulta = f"""
+            SELECT codigo, id, nome, calorias, proteina, carboidrato, gordura FROM foods
+            WHERE fonte = ? AND codigo IN ({', '.join('?' * len(codigos))})
+        """
+        antes = {row[1]: row[3:] for row in conn.execute(consulta, [fonte] + codigos)}
+        conn.executemany("""
+            INSERT INTO foods (fonte, codigo, nome, categoria, calorias, proteina, carboidrato,
+                               gordura, gramas_porcao)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, 100)
+            ON CONFLICT (fonte, codigo) DO UPDATE SET
+                nome = excluded.nome, categoria = excluded.categoria,
+                calorias = excluded.calorias, proteina = excluded.proteina,
+                carboidrato = excluded.carboidrato, gordura = excluded.gordura
+            WHERE NOT EXISTS (SELECT 1 FROM foods outro
+                              WHERE outro.nome = excluded.nome AND outro.id <> foods.id)
+            ON CONFLICT DO NOTHING
+        """, [(fonte, a["codigo"], a["nome"], a["categoria"], a["calorias"], a["proteina"],
+               a["carboidrato"], a["gordura"]) for a in alimentos])
+        # Gravados são os que ficaram com o nome do arquivo; os demais foram ignorados
+        nomes = {a["codigo"]: a["nome"] for a in alimentos}
+        depois = [row for row in conn.execute(consulta, [fonte] + codigos) if nomes[row[0]] == row[2]]
+        food_ids = {row[0]: row[1] for row in depois}
+        alterados = [row[1] for row in depois if row[1] in antes and antes[row[1]] != row[3:]]
+        usuarios = []
+        if alterados:
+            usuarios = [row[0] for row in conn.execute(f"""
+                SELECT DISTINCT fl.user_id FROM food_log_items i
+                JOIN food_log fl ON fl.id = i.food_log_id
+                WHERE i.food_id IN ({', '.join('?' * len(alterados))})
+            """, alterados)]
+            _recalcula_totais_alimentares(conn, FATOR_SQL, alterados)
+        conn.executemany("""
+            INSERT INTO food_nutrients (food_id, nutriente, valor, unidade)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT (food_id, nutriente) DO UPDATE SET
+                valor = excluded.valor, unidade = excluded.unidade
+        """, [(food_ids[a["codigo"]], nutriente, valor, unidade)
+              for a in alimentos if a["codigo"] in food_ids
+              for nutriente, (valor, unidade) in a["nutrientes"].items()])
+    _read_cache.bump(None, "foods")
+    for user_id in usuarios:
+        _read_cache.bump(user_id, "daily_summary")
+    return len(food_ids), len(alimentos) - len(food_ids)
+
+@invalidates("food_log", "daily_summary")
+def save_food_log(user_id, food_data):
+    with db_writer() as conn:
+        cur = conn.execute("""
+            INSERT INTO food_log (user_id, data)
+            VALUES (?, ?)
+        """, (user_id, food_data["data"]))
+        food_log_id = cur.lastrowid
+        # O app já envia food_id; só alimentos identificados pelo nome são buscados
+        nomes = {alimento["nome"] for alimento in food_data["alimentos"] if not alimento.get("food_id")}
+        food_ids = {}
+        if nomes:
+            food_ids = dict(conn.execute(f"""
+                SELECT nome, id FROM foods WHERE nome IN ({', '.join('?' * len(nomes))})
+            """, list(nomes)))
+            desconhecidos = nomes - set(food_ids)
+            if desconhecidos:
+                raise ValueError(f"alimentos fora do catálogo: {', '.join(sorted(desconhecidos))}")
+        conn.executemany("""
+            INSERT INTO food_log_items (food_log_id, food_id, quantidade, unidade)
+            VALUES (?, ?, ?, ?)
+        """, [(food_log_id, alimento.get("food_id") or food_ids[alimento["nome"]],
+               alimento["quantidade"], alimento["unidade"])
+              for alimento in food_data["alimentos"]])
+        totais = conn.execute(f"""
+            SELECT {TOTAIS_SQL}
+            FROM food_log_items i
+            JOIN foods f ON f.id = i.food_id
+            WHERE i.food_log_id = ?
+        """, (food_log_id,)).fetchone()
+        update_daily_summary(conn, user_id, food_data["data"], calorias=totais[0],
+                             proteina=totais[1], carboidrato=totais[2], gordura=totais[3])
+    return food_log_id
+
+@cached_read("food_log", "foods")
+def load_food_log(user_id):
+    with db_reader() as conn:
+        rows = conn.execute(f"""
+            SELECT fl.id, fl.data, {TOTAIS_SQL}
+            FROM food_log fl
+            LEFT JOIN food_log_items i ON i.food_log_id = fl.id
+            LEFT JOIN foods f ON f.id = i.food_id
+            WHERE fl.user_id = ?
+            GROUP BY fl.id
+            ORDER BY fl.data DESC
+        """, (user_id,)).fetchall()
+        items = conn.execute("""
+            SELECT i.food_log_id, f.id, f.nome, f.categoria, f.calorias, f.proteina,
+                   f.carboidrato, f.gordura, i.quantidade, i.unidade
+            FROM food_log fl
+            JOIN food_log_items i ON i.food_log_id = fl.id
+            JOIN foods f ON f.id = i.food_id
+            WHERE fl.user_id = ?
+            ORDER BY i.id
+        """, (user_id,)).fetchall()
+
+    alimentos = {}
+    for item in items:
+        alimentos.setdefault(item[0], []).append({
+            "food_id": item[1],
+            "nome": item[2],
+            "categoria": item[3],
+            "calorias": item[4],
+            "proteina": item[5],
+            "carboidrato": item[6],
+            "gordura": item[7],
+            "quantidade": item[8],
+            "unidade": item[9]
+        })
+
+    food_log = []
+    for row in rows:
+        food_log.append({
+            "id": row[0],
+            "data": row[1],
+            "alimentos": alimentos.get(row[0], []),
+            "totais": {
+                "calorias": row[2],
+                "proteina": row[3],
+                "carboidrato": row[4],
+                "gordura": row[5]
+            }
+        })
+    return food_log
+
+@cached_read("food_log", "foods")
+def load_food_totals(user_id, periodo="dia", inicio=None, fim=None):
+    # Totais de macros agregados no SQLite por dia ("dia") ou semana ("semana",
+    # identificada pela segunda-feira)
+    chave = "fl.data" if periodo == "dia" else "date(fl.data, 'weekday 0', '-6 days')"
+    filtros, params = ["fl.user_id = ?"], [user_id]
+    if inicio:
+        filtros.append("fl.data >= ?")
+        params.append(inicio)
+    if fim:
+        filtros.append("fl.data <= ?")
+        params.append(fim)
+    with db_reader() as conn:
+        rows = conn.execute(f"""
+            SELECT {chave} AS periodo, {TOTAIS_SQL}
+            FROM food_log fl
+            JOIN food_log_items i ON i.food_log_id = fl.id
+            JOIN foods f ON f.id = i.food_id
+            WHERE {' AND '.join(filtros)}
+            GROUP BY periodo
+            ORDER BY periodo
+        """, params).fetchall()
+
+    return [{
+        "periodo": row[0],
+        "calorias": row[1],
+        "proteina": row[2],
+        "carboidrato": row[3],
+        "gordura": row[4]
+    } for row in rows]
+
+# --- IMPORTAÇÃO DE HISTÓRICO ---
+# Carga em massa de pesagens, sono e água (planilhas, relógios). Recebe um
+# valor por dia; dias que o membro já tem na tabela são ignorados. Grava em
+# lotes, cada lote em uma transação junto com o daily_summary.
+BACKFILL_LOTE = 1000
+
+def _dias_existentes(conn, tabela, user_id):
+    return {row[0] for row in conn.execute(f"SELECT DISTINCT data FROM {tabela} WHERE user_id = ?", (user_id,))}
+
+@invalidates("progress_data", "water_log", "sleep_log", "daily_summary")
+def backfill_history(user_id, progresso=None, agua=None, sono=None, lote=BACKFILL_LOTE):
+    # progresso: {data: (peso, circunferencia_abdomen)}; agua: {data: ml}; sono: {data: horas}
+    # Retorna {tabela: (inseridos, ignorados)}
+    with db_reader() as conn:
+        existentes = {tabela: _dias_existentes(conn, tabela, user_id)
+                      for tabela in ["progress_data", "water_log", "sleep_log"]}
+    novos = {
+        "progress_data": [(user_id, d, p, c, "importado") for d, (p, c) in sorted((progresso or {}).items())
+                          if d not in existentes["progress_data"]],
+        "water_log": [(user_id, d, ml) for d, ml in sorted((agua or {}).items())
+                      if d not in existentes["water_log"]],
+        "sleep_log": [(user_id, d, h) for d, h in sorted((sono or {}).items())
+                      if d not in existentes["sleep_log"]],
+    }
+    for inicio in range(0, max(len(linhas) for linhas in novos.values()), lote):
+        with db_writer() as conn:
+            progresso_lote = novos["progress_data"][inicio:inicio + lote]
+            conn.executemany("""
+                INSERT INTO progress_data (user_id, data, peso, circunferencia_abdomen, observacoes)
+                VALUES (?, ?, ?, ?, ?)
+            """, progresso_lote)
+            _insert_water_logs(conn, novos["water_log"][inicio:inicio + lote])
+            _insert_sleep_logs(conn, novos["sleep_log"][inicio:inicio + lote])
+    totais = {"progress_data": progresso, "water_log": agua, "sleep_log": sono}
+    return {tabela: (len(novos[tabela]), len(totais[tabela] or {}) - len(novos[tabela])) for tabela in novos}
+
+# --- EXPORTAÇÃO ---
+# Consultas do histórico completo de um membro, uma por tabela exportada.
+# Lidas em lotes com fetchmany (iter_export_rows), sem montar a lista inteira.
+# Colunas JSON (exercicios, exercicios_completos) saem como texto.
+EXPORT_QUERIES = {
+    "perfil": """
+        SELECT nome, idade, genero, altura, peso, objetivo, nivel_atividade,
+               meta_peso, bmi, bmr, tdee, data_cadastro
+        FROM user_profiles WHERE user_id = ?
+    """,
+    "planos_treino": """
+        SELECT id, plano_nome, dias_semana, exercicios, data_criacao
+        FROM workouts WHERE user_id = ? ORDER BY id
+    """,
+    "historico_treinos": """
+        SELECT id, plano, data, inicio, fim, duracao, exercicios_completos
+        FROM workout_history WHERE user_id = ? ORDER BY id
+    """,
+    "refeicoes": f"""
+        SELECT fl.id AS refeicao_id, fl.data, f.nome AS alimento, f.categoria,
+               i.quantidade, i.unidade,
+               f.calorias * {FATOR_SQL} AS calorias, f.proteina * {FATOR_SQL} AS proteina,
+               f.carboidrato * {FATOR_SQL} AS carboidrato, f.gordura * {FATOR_SQL} AS gordura
+        FROM food_log fl
+        JOIN food_log_items i ON i.food_log_id = fl.id
+        JOIN foods f ON f.id = i.food_id
+        WHERE fl.user_id = ?
+        ORDER BY fl.id, i.id
+    """,
+    "progresso": """
+        SELECT id, data, peso, circunferencia_abdomen, observacoes
+        FROM progress_data WHERE user_id = ? ORDER BY id
+    """,
+    "agua": "SELECT id, data, ml FROM water_log WHERE user_id = ? ORDER BY id",
+    "sono": "SELECT id, data, horas FROM sleep_log WHERE user_id = ? ORDER BY id",
+    "resumo_diario": """
+        SELECT data, water_ml, sleep_horas, calorias, proteina, carboidrato,
+               gordura, treinos, treino_minutos
+        FROM daily_summary WHERE user_id = ? ORDER BY data
+    """,
+}
+EXPORT_LOTE = 1000
+
+def iter_export_rows(user_id, tabela, lote=EXPORT_LOTE):
+    # Gerador: primeiro a tupla com os nomes das colunas, depois as linhas.
+    # A conexão de leitura fica presa enquanto o gerador estiver aberto
+    # (mesmo snapshot do começo ao fim) e volta ao pool ao terminar ou fechar.
+    with db_reader() as conn:
+        cur = conn.execute(EXPORT_QUERIES[tabela], (user_id,))
+        yield tuple(coluna[0] for coluna in cur.description)
+        while True:
+            rows = cur.fetchmany(lote)
+            if not rows:
+                break
+            yield from rows
+
+# --- ANÁLISE DA ACADEMIA ---
+# Agregados semanais de todos os membros, calculados inteiramente no SQLite
+# (nenhuma linha por usuário chega ao Python). Semanas identificadas pela
+# segunda-feira. Adesão = treinos da semana / dias do plano (limitada a 100%),
+# média entre os membros ativos que têm plano; retidos = ativos que também
+# treinaram na semana anterior.
+ANALISE_SQL = """
+    WITH RECURSIVE semanas (semana) AS (
+        SELECT :inicio
+        UNION ALL
+        SELECT date(semana, '+7 days') FROM semanas WHERE semana < :ultima
+    ),
+    treinos AS (
+        SELECT user_id, date(data, 'weekday 0', '-6 days') AS semana,
+               COUNT(*) AS treinos, SUM(duracao) AS duracao
+        FROM workout_history
+        WHERE data >= date(:inicio, '-7 days')
+        GROUP BY user_id, semana
+    ),
+    treinos_lag AS (
+        SELECT *, LAG(semana) OVER (PARTITION BY user_id ORDER BY semana) AS anterior
+        FROM treinos
+    ),
+    por_semana AS (
+        -- Dias planejados: maior plano do membro (busca pelo índice de workouts)
+        SELECT t.semana, COUNT(*) AS ativos, SUM(t.treinos) AS treinos, SUM(t.duracao) AS duracao,
+               AVG(MIN(1.0 * t.treinos / (
+                   SELECT MAX(length(p.dias_semana) - length(replace(p.dias_semana, ',', '')) + 1)
+                   FROM workouts p
+                   WHERE p.user_id = t.user_id AND p.dias_semana <> ''
+               ), 1.0)) AS adesao,
+               SUM(t.anterior = date(t.semana, '-7 days')) AS retidos
+        FROM treinos_lag t
+        WHERE t.semana >= :inicio
+        GROUP BY t.semana
+    ),
+    refeicoes AS (
+        SELECT date(data, 'weekday 0', '-6 days') AS semana, COUNT(DISTINCT user_id) AS membros
+        FROM food_log
+        WHERE data >= :inicio
+        GROUP BY semana
+    ),
+    cadastros AS (
+        SELECT semana, SUM(novos) OVER (ORDER BY semana) AS total
+        FROM (
+            SELECT date(created_at, 'weekday 0', '-6 days') AS semana, COUNT(*) AS novos
+            FROM users
+            GROUP BY semana
+        )
+    )
+    SELECT s.semana,
+           COALESCE((SELECT total FROM cadastros c WHERE c.semana <= s.semana
+                     ORDER BY c.semana DESC LIMIT 1), 0) AS membros,
+           COALESCE(w.ativos, 0), COALESCE(w.treinos, 0),
+           w.duracao / w.treinos / 60.0,
+           w.adesao,
+           COALESCE(w.retidos, 0),
+           COALESCE(r.membros, 0)
+    FROM semanas s
+    LEFT JOIN por_semana w ON w.semana = s.semana
+    LEFT JOIN refeicoes r ON r.semana = s.semana
+    ORDER BY s.semana
+"""
+
+def load_gym_analytics(semanas=12, hoje=None):
+    hoje = hoje or datetime.now().date()
+    ultima = hoje - timedelta(days=hoje.weekday())
+    inicio = ultima - timedelta(weeks=semanas - 1)
+    with db_reader() as conn:
+        rows = conn.execute(ANALISE_SQL, {"inicio": inicio.isoformat(),
+                                          "ultima": ultima.isoformat()}).fetchall()
+
+    resultado = []
+    for semana, membros, ativos, treinos, duracao, adesao, retidos, refeicoes in rows:
+        resultado.append({
+            "semana": semana,
+            "membros": membros,
+            "ativos": ativos,
+            "treinos": treinos,
+            "duracao_media_min": duracao,
+            "adesao": adesao,
+            "taxa_ativos": ativos / membros if membros else None,
+            "taxa_retencao": retidos / ativos if ativos else None,
+            "taxa_registro_refeicoes": refeicoes / membros if membros else None,
+        })
+    return resultado
+
+@invalidates("progress_data")
+def save_progress_data(user_id, progress_data):
+    with db_writer() as conn:
+        conn.execute("""
+            INSERT INTO progress_data (user_id, data, peso, circunferencia_abdomen, observacoes)
+            VALUES (?, ?, ?, ?, ?)
+        """, (
+            user_id, progress_data["data"], progress_data["peso"],
+            progress_data["circunferencia_abdomen"], progress_data["observacoes"]
+        ))
+
+@cached_read("progress_data")
+def load_progress_data(user_id, after_id=None):
+    filtro, params, ordem = delta_filter(after_id, "data DESC")
+    with db_reader() as conn:
+        rows = conn.execute(f"""
+            SELECT id, data, peso, circunferencia_abdomen, observacoes
+            FROM progress_data
+            WHERE user_id = ? {filtro}
+            ORDER BY {ordem}
+        """, [user_id] + params).fetchall()
+
+    progress = []
+    for row in rows:
+        progress.append({
+            "id": row[0],
+            "data": row[1],
+            "peso": row[2],
+            "circunferencia_abdomen": row[3],
+            "observacoes": row[4]
+        })
+    return progress
+
+@invalidates("water_log", "daily_summary")
+def save_water_log(user_id, water_data):
+    linha = (user_id, water_data["data"], water_data["ml"])
+    if WRITE_BEHIND_MODO != "off":
+        return get_write_behind().put("water_log", linha)
+    with db_writer() as conn:
+        _insert_water_logs(conn, [linha])
+
+def _insert_water_logs(conn, linhas):
+    conn.executemany("INSERT INTO water_log (user_id, data, ml) VALUES (?, ?, ?)", linhas)
+    # Um update no resumo por (usuário, dia), com a soma do lote
+    somas = {}
+    for user_id, data, ml in linhas:
+        somas[(user_id, data)] = somas.get((user_id, data), 0) + ml
+    for (user_id, data), ml in somas.items():
+        update_daily_summary(conn, user_id, data, water_ml=ml)
+
+@cached_read("water_log")
+def load_water_log(user_id):
+    with db_reader() as conn:
+        rows = conn.execute("""
+            SELECT id, data, ml
+            FROM water_log
+            WHERE user_id = ?
+            ORDER BY data DESC
+        """, (user_id,)).fetchall()
+
+    water_log = []
+    for row in rows:
+        water_log.append({
+            "id": row[0],
+            "data": row[1],
+            "ml": row[2]
+        })
+    return water_log
+
+@invalidates("sleep_log", "daily_summary")
+def save_sleep_log(user_id, sleep_data):
+    linha = (user_id, sleep_data["data"], sleep_data["horas"])
+    if WRITE_BEHIND_MODO != "off":
+        return get_write_behind().put("sleep_log", linha)
+    with db_writer() as conn:
+        _insert_sleep_logs(conn, [linha])
+
+def _insert_sleep_logs(conn, linhas):
+    conn.executemany("INSERT INTO sleep_log (user_id, data, horas) VALUES (?, ?, ?)", linhas)
+    # O resumo guarda o último registro de cada (usuário, dia)
+    ultimos = {(user_id, data): horas for user_id, data, horas in linhas}
+    for (user_id, data), horas in ultimos.items():
+        update_daily_summary(conn, user_id, data, sleep_horas=horas)
+
+@cached_read("sleep_log")
+def load_sleep_log(user_id):
+    with db_reader() as conn:
+        rows = conn.execute("""
+            SELECT id, data, horas
+            FROM sleep_log
+            WHERE user_id = ?
+            ORDER BY data DESC
+        """, (user_id,)).fetchall()
+
+    sleep_log = []
+    for row in rows:
+        sleep_log.append({
+            "id": row[0],
+            "data": row[1],
+            "horas": row[2]
+        })
+    return sleep_log
+
+# --- ESCRITA EM LOTE (WRITE-BEHIND) ---
+# Opcional, para registros frequentes (água e sono): as gravações vão para uma
+# fila e uma thread grava tudo com executemany em uma única transação a cada
+# WRITE_BEHIND_INTERVALO_MS ou WRITE_BEHIND_MAX_LINHAS linhas. Modos:
+#   off   - cada save abre e confirma sua própria transação (padrão)
+#   group - o save espera o commit do lote (commit em grupo: nada se perde,
+#           mas chamadas concorrentes dividem a mesma transação)
+#   async - o save retorna na hora; em caso de queda do processo, o último
+#           lote (até um intervalo) pode ser perdido
+WRITE_BEHIND_MODO = os.environ.get("FITNESSHUB_WRITE_BEHIND", "off")
+WRITE_BEHIND_INTERVALO_MS = int(os.environ.get("FITNESSHUB_WRITE_BEHIND_MS", "100"))
+WRITE_BEHIND_MAX_LINHAS = 500
+
+WRITE_BEHIND_TABELAS = {
+    "water_log": _insert_water_logs,
+    "sleep_log": _insert_sleep_logs,
+}
+
+class _Pendente:
+    def __init__(self):
+        self.feito = threading.Event()
+        self.erro = None
+
+class WriteBehindQueue:
+    def __init__(self, intervalo_ms=WRITE_BEHIND_INTERVALO_MS, max_linhas=WRITE_BEHIND_MAX_LINHAS,
+                 aguardar_commit=True):
+        self.intervalo = intervalo_ms / 1000
+        self.max_linhas = max_linhas
+        self.aguardar_commit = aguardar_commit
+        self._fila = queue.Queue()
+        self._fechada = False
+        self._thread = threading.Thread(target=self._loop, name="write-behind", daemon=True)
+        self._thread.start()
+
+    def put(self, tabela, linha):
+        if self._fechada:
+            raise RuntimeError("fila de escrita encerrada")
+        pendente = _Pendente() if self.aguardar_commit else None
+        self._fila.put((tabela, linha, pendente))
+        if pendente:
+            pendente.feito.wait()
+            if pendente.erro:
+                raise pendente.erro
+
+    def flush(self):
+        # Grava tudo o que já está na fila e espera o commit
+        pendente = _Pendente()
+        self._fila.put((None, None, pendente))
+        pendente.feito.wait()
+
+    def close(self):
+        if not self._fechada:
+            self._fechada = True
+            self.flush()
+            self._fila.put(None)
+            self._thread.join()
+
+    def _loop(self):
+        while True:
+            item = self._fila.get()
+            if item is None:
+                return
+            lote = [item]
+            # No modo async espera o intervalo para juntar linhas; no group quem
+            # chamou está bloqueado, então só junta o que já está na fila (o que
+            # chega durante um commit entra no próximo lote)
+            espera = 0 if self.aguardar_commit else self.intervalo
+            limite = time.monotonic() + espera
+            while len(lote) < self.max_linhas and lote[-1][0] is not None:
+                try:
+                    lote.append(self._fila.get(timeout=max(limite - time.monotonic(), 0)))
+                except queue.Empty:
+                    break
+                if lote[-1] is None:
+                    lote.pop()
+                    self._fila.put(None)
+                    break
+            try:
+                self._grava(lote)
+            except Exception as erro:  # a thread continua atendendo a fila
+                print(f"write-behind: falha no lote: {erro}", file=sys.stderr)
+
+    def _grava(self, lote):
+        # Qualquer erro (não só sqlite3.Error, ex.: TypeError de uma linha mal
+        # formada) fica com a linha que o causou; quem espera sempre é liberado
+        escritas = [item for item in lote if item[0] is not None]
+        try:
+            try:
+                self._transacao(escritas)
+            except Exception:
+                # Uma linha ruim não derruba o lote: regrava uma a uma
+                for item in escritas:
+                    try:
+                        self._transacao([item])
+                    except Exception as erro:
+                        if item[2]:
+                            item[2].erro = erro
+                        else:
+                            print(f"write-behind: falha ao gravar {item[0]} {item[1]}: {erro}", file=sys.stderr)
+        finally:
+            for _, _, pendente in lote:
+                if pendente:
+                    pendente.feito.set()
+
+    def _transacao(self, escritas):
+        if not escritas:
+            return
+        por_tabela = {}
+        for tabela, linha, _ in escritas:
+            por_tabela.setdefault(tabela, []).append(linha)
+        with db_writer() as conn:
+            for tabela, linhas in por_tabela.items():
+                WRITE_BEHIND_TABELAS[tabela](conn, linhas)
+        # Versões do cache só mudam depois do commit
+        for tabela, linhas in por_tabela.items():
+            for user_id in {linha[0] for linha in linhas}:
+                _read_cache.bump(user_id, tabela, "daily_summary")
+
+_write_behind = None
+_write_behind_lock = threading.Lock()
+
+def get_write_behind():
+    global _write_behind
+    if _write_behind is None:
+        with _write_behind_lock:
+            if _write_behind is None:
+                _write_behind = WriteBehindQueue(aguardar_commit=WRITE_BEHIND_MODO != "async")
+    return _write_behind
+
+def configure_write_behind(modo, intervalo_ms=WRITE_BEHIND_INTERVALO_MS, max_linhas=WRITE_BEHIND_MAX_LINHAS):
+    # Troca o modo em tempo de execução; a fila anterior é esvaziada antes
+    global _write_behind, WRITE_BEHIND_MODO
+    if modo not in ("off", "group", "async"):
+        raise ValueError(f"modo de escrita desconhecido: {modo!r}")
+    with _write_behind_lock:
+        if _write_behind is not None:
+            _write_behind.close()
+        WRITE_BEHIND_MODO = modo
+        _write_behind = None if modo == "off" else WriteBehindQueue(intervalo_ms, max_linhas,
+                                                                    aguardar_commit=modo != "async")
+
+def flush_write_behind():
+    if _write_behind is not None:
+        _write_behind.flush()
+
+# Registrado depois do fechamento do pool, então roda antes dele
+atexit.register(lambda: _write_behind is not None and _write_behind.close())
+
+# --- LINHA DE COMANDO ---
+# Preparação comum aos scripts (import_foods, import_history, export): opção
+# --banco, migrações pendentes e o membro identificado pelo e-mail
+def add_database_argument(parser):
+    parser.add_argument("--banco", help="arquivo do banco (padrão: FITNESSHUB_DB ou fitnesshub.db)")
+
+def prepare_cli_database(banco=None):
+    if banco:
+        configure_database(banco)
+    run_migrations()
+
+def cli_user_id(email):
+    with db_reader() as conn:
+        usuario = conn.execute("SELECT id FROM users WHERE email = ?", (email,)).fetchone()
+    if not usuario:
+        raise SystemExit(f"Erro: usuário {email} não encontrado")
+    return usuario[0]
+
+if __name__ == "__main__":
+    # python database.py -> aplica as migrações pendentes no banco configurado
+    aplicadas = run_migrations()
+    print(f"Banco: {DB_PATH}")
+    print(f"Migrações aplicadas: {aplicadas or 'nenhuma (esquema já atualizado)'}")
+
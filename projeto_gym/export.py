@@ -0,0 +1,84 @@
+# Exporta o histórico completo de um membro em CSV ou JSON Lines. As linhas
+# vêm de database.iter_export_rows (fetchmany em lotes); na CLI são escritas
+# à medida que chegam, então a memória não cresce com o tamanho do histórico.
+# No app o download é montado em bytes (o Streamlit o guarda em memória).
+#
+# Uso (a partir de projeto_gym/):
+#   python export.py membro@email.com                      # todas as tabelas, CSV, em ./export/
+#   python export.py membro@email.com --tabela agua --formato jsonl --saida -   # para stdout
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+
+import database
+
+FORMATOS = {"csv": "text/csv", "jsonl": "application/x-ndjson"}
+COLUNAS_JSON = {"exercicios", "exercicios_completos"}
+
+def iter_csv(user_id, tabela):
+    # Produz o CSV em pedaços de texto, um por lote de linhas
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+    linhas = database.iter_export_rows(user_id, tabela)
+    escritor.writerow(next(linhas))
+    for n, linha in enumerate(linhas, 1):
+        escritor.writerow(linha)
+        if n % database.EXPORT_LOTE == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+def iter_jsonl(user_id, tabela):
+    # Um objeto JSON por linha; colunas JSON viram objetos, não strings
+    linhas = database.iter_export_rows(user_id, tabela)
+    colunas = next(linhas)
+    json_idx = [i for i, coluna in enumerate(colunas) if coluna in COLUNAS_JSON]
+    for linha in linhas:
+        registro = dict(zip(colunas, linha))
+        for i in json_idx:
+            registro[colunas[i]] = database.load_blob(linha[i], None)
+        yield json.dumps(registro, ensure_ascii=False) + "\n"
+
+def iter_export(user_id, tabela, formato):
+    return iter_csv(user_id, tabela) if formato == "csv" else iter_jsonl(user_id, tabela)
+
+def write_export(user_id, tabela, formato, arquivo):
+    for pedaco in iter_export(user_id, tabela, formato):
+        arquivo.write(pedaco)
+
+def export_bytes(user_id, tabela, formato):
+    # Para o st.download_button: o Streamlit guarda o download inteiro em
+    # memória antes de enviar, então aqui o arquivo é montado direto em bytes.
+    # Só a CLI (write_export em arquivo/stdout) grava em memória constante.
+    return "".join(iter_export(user_id, tabela, formato)).encode("utf-8")
+
+def main():
+    parser = argparse.ArgumentParser(description="Exporta o histórico de um membro (CSV / JSON Lines).")
+    parser.add_argument("email")
+    parser.add_argument("--tabela", choices=["todas"] + list(database.EXPORT_QUERIES), default="todas")
+    parser.add_argument("--formato", choices=list(FORMATOS), default="csv")
+    parser.add_argument("--saida", default="export", help="pasta de destino, ou - para stdout")
+    database.add_database_argument(parser)
+    args = parser.parse_args()
+
+    database.prepare_cli_database(args.banco)
+    user_id = database.cli_user_id(args.email)
+
+    tabelas = list(database.EXPORT_QUERIES) if args.tabela == "todas" else [args.tabela]
+    if args.saida == "-":
+        for tabela in tabelas:
+            write_export(user_id, tabela, args.formato, sys.stdout)
+        return
+    os.makedirs(args.saida, exist_ok=True)
+    for tabela in tabelas:
+        caminho = os.path.join(args.saida, f"{tabela}.{args.formato}")
+        with open(caminho, "w", encoding="utf-8", newline="") as arquivo:
+            write_export(user_id, tabela, args.formato, arquivo)
+        print(f"{caminho}", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+# Importa tabelas de composição de alimentos (ex.: CSV no formato da TACO)
+# para o catálogo foods/food_nutrients. O arquivo é lido linha a linha e gravado
+# em lotes, cada lote em uma transação, então a memória não cresce com o arquivo.
+#
+# Uso (a partir de projeto_gym/):
+#   python import_foods.py taco.csv --fonte TACO
+#   python import_foods.py taco.csv --encoding latin-1 --lote 5000 --banco outro.db
+import argparse
+import csv
+import math
+import re
+import sys
+import time
+import unicodedata
+
+import database
+
+LOTE_PADRAO = 2000
+
+# Unidade de origem -> (unidade gravada, fator de conversão)
+CONVERSOES = {
+    "kcal": ("kcal", 1.0),
+    "kj": ("kcal", 1 / 4.184),
+    "g": ("g", 1.0),
+    "mg": ("mg", 1.0),
+    "mcg": ("mg", 0.001),
+    "ug": ("mg", 0.001),
+    "%": ("%", 1.0),
+}
+
+# Nutrientes que também preenchem as colunas de macros de foods
+MACROS = {
+    "energia": "calorias",
+    "proteina": "proteina",
+    "proteinas": "proteina",
+    "carboidrato": "carboidrato",
+    "carboidratos": "carboidrato",
+    "carboidrato_total": "carboidrato",
+    "lipideos": "gordura",
+    "lipidios": "gordura",
+    "gordura": "gordura",
+    "gordura_total": "gordura",
+}
+
+COLUNAS_CODIGO = {"numero do alimento", "numero", "codigo", "id"}
+COLUNAS_NOME = {"descricao dos alimentos", "descricao", "nome", "alimento"}
+COLUNAS_CATEGORIA = {"categoria do alimento", "categoria", "grupo"}
+VALORES_AUSENTES = {"", "na", "nd", "*", "-"}
+
+class LinhaInvalida(ValueError):
+    pass
+
+class ArquivoInvalido(ValueError):
+    # Problema no arquivo inteiro (cabeçalho, arquivo vazio); main() vira saída com erro
+    pass
+
+def normaliza(texto):
+    # "Proteína (µg)" -> "proteina (ug)"
+    texto = texto.replace("µ", "u").replace("μ", "u")
+    sem_acento = unicodedata.normalize("NFKD", texto).encode("ascii", "ignore").decode()
+    return re.sub(r"\s+", " ", sem_acento).strip().lower()
+
+def interpreta_cabecalho(cabecalho):
+    # Resolvido uma vez por arquivo:
+    #   textos: [(índice, "codigo" | "nome" | "categoria")]
+    #   nutrientes: [(índice, nutriente, unidade gravada, fator de conversão)]
+    #   largura: número de colunas do cabeçalho
+    textos, nutrientes = [], []
+    for i, titulo in enumerate(cabecalho):
+        chave = normaliza(titulo)
+        unidade = re.match(r"^(.*?)\s*\(([^)]+)\)$", chave)
+        if chave in COLUNAS_CODIGO:
+            textos.append((i, "codigo"))
+        elif chave in COLUNAS_NOME:
+            textos.append((i, "nome"))
+        elif chave in COLUNAS_CATEGORIA:
+            textos.append((i, "categoria"))
+        elif unidade and unidade.group(2) in CONVERSOES:
+            nutriente = re.sub(r"\W+", "_", unidade.group(1)).strip("_")
+            nutrientes.append((i, nutriente) + CONVERSOES[unidade.group(2)])
+    if "nome" not in [destino for _, destino in textos]:
+        raise ArquivoInvalido("o arquivo não tem coluna com o nome/descrição do alimento")
+    return textos, nutrientes, len(cabecalho)
+
+def converte_valor(bruto):
+    texto = bruto.strip()
+    if "," in texto:
+        texto = texto.replace(".", "").replace(",", ".")
+    try:
+        valor = float(texto)
+    except ValueError:
+        texto = texto.lower()
+        if texto in VALORES_AUSENTES:
+            return None
+        if texto.startswith("tr"):  # "Tr" = traço
+            return 0.0
+        raise LinhaInvalida(f"valor inválido: {bruto!r}")
+    if valor < 0 or not math.isfinite(valor):
+        raise LinhaInvalida(f"valor inválido: {bruto!r}")
+    return valor
+
+def converte_linha(linha, colunas):
+    textos, colunas_nutrientes, largura = colunas
+    if len(linha) < largura:
+        linha = linha + [""] * (largura - len(linha))
+    alimento = {"codigo": None, "nome": None, "categoria": None}
+    for i, destino in textos:
+        alimento[destino] = linha[i].strip() or None
+    nutrientes = {}
+    for i, nutriente, unidade, fator in colunas_nutrientes:
+        valor = converte_valor(linha[i])
+        # Com "Energia (kcal)" e "Energia (kJ)", vale a primeira preenchida
+        if valor is not None and nutriente not in nutrientes:
+            nutrientes[nutriente] = (valor * fator if fator != 1.0 else valor, unidade)
+    alimento["nutrientes"] = nutrientes
+    if not alimento["nome"]:
+        raise LinhaInvalida("alimento sem nome")
+    alimento["codigo"] = alimento["codigo"] or alimento["nome"]
+    for nutriente, coluna in MACROS.items():
+        if nutriente in nutrientes:
+            alimento.setdefault(coluna, nutrientes[nutriente][0])
+    for coluna in ["calorias", "proteina", "carboidrato", "gordura"]:
+        alimento.setdefault(coluna, 0.0)
+    return alimento
+
+def ler_alimentos(arquivo, delimitador, erros):
+    # Gerador: produz um alimento por linha válida; linhas inválidas vão para `erros`
+    leitor = csv.reader(arquivo, delimiter=delimitador)
+    cabecalho = next(leitor, None)
+    if cabecalho is None:
+        raise ArquivoInvalido("arquivo vazio")
+    colunas = interpreta_cabecalho(cabecalho)
+    for linha in leitor:
+        if not any(campo.strip() for campo in linha):
+            continue
+        try:
+            yield converte_linha(linha, colunas)
+        except LinhaInvalida as erro:
+            erros["total"] += 1
+            if len(erros["exemplos"]) < 10:
+                erros["exemplos"].append(f"linha {leitor.line_num}: {erro}")
+
+def em_lotes(iteravel, tamanho):
+    lote = []
+    for item in iteravel:
+        lote.append(item)
+        if len(lote) == tamanho:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
+
+def detecta_delimitador(arquivo):
+    amostra = arquivo.read(8192)
+    arquivo.seek(0)
+    try:
+        return csv.Sniffer().sniff(amostra, delimiters=",;\t").delimiter
+    except csv.Error:
+        return ","
+
+def main():
+    parser = argparse.ArgumentParser(description="Importa uma tabela de composição de alimentos (CSV).")
+    parser.add_argument("arquivo")
+    parser.add_argument("--fonte", default="TACO", help="identificador da tabela de origem")
+    parser.add_argument("--encoding", default="utf-8-sig")
+    parser.add_argument("--delimitador", help="detectado automaticamente se omitido")
+    parser.add_argument("--lote", type=int, default=LOTE_PADRAO, help="linhas por transação")
+    database.add_database_argument(parser)
+    args = parser.parse_args()
+
+    database.prepare_cli_database(args.banco)
+
+    inicio = time.perf_counter()
+    gravados = ignorados = 0
+    erros = {"total": 0, "exemplos": []}
+    with open(args.arquivo, encoding=args.encoding, newline="") as arquivo:
+        delimitador = args.delimitador or detecta_delimitador(arquivo)
+        try:
+            for lote in em_lotes(ler_alimentos(arquivo, delimitador, erros), args.lote):
+                ok, ignorados_lote = database.upsert_foods(lote, args.fonte)
+                gravados += ok
+                ignorados += ignorados_lote
+                print(f"\r{gravados} alimentos gravados...", end="", file=sys.stderr)
+        except ArquivoInvalido as erro:
+            raise SystemExit(f"Erro: {erro}")
+
+    print(file=sys.stderr)
+    print(f"Gravados: {gravados} | Ignorados (nome já existente): {ignorados} | "
+          f"Inválidos: {erros['total']} | Tempo: {time.perf_counter() - inicio:.1f}s")
+    for exemplo in erros["exemplos"]:
+        print(f"  - {exemplo}")
+
+if __name__ == "__main__":
+    main()
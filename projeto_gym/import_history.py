@@ -0,0 +1,152 @@
+# Importa histórico de peso, sono e água de planilhas ou exportações de
+# relógios/apps (CSV) para progress_data, sleep_log e water_log de um membro.
+# Cada coluna do arquivo é mapeada pelo cabeçalho (ou por --coluna destino=título);
+# vários registros no mesmo dia viram um (água somada, peso e sono do último).
+# Dias que o membro já tem são mantidos; o restante é gravado em lotes.
+#
+# Uso (a partir de projeto_gym/):
+#   python import_history.py membro@email.com historico.csv
+#   python import_history.py membro@email.com sono.csv --coluna data=Date --coluna sono="Asleep (min)"
+import argparse
+import csv
+import re
+import time
+from datetime import datetime
+
+import database
+from import_foods import ArquivoInvalido, LinhaInvalida, converte_valor, detecta_delimitador, normaliza
+
+# Destino -> títulos aceitos (já normalizados, sem a unidade entre parênteses)
+COLUNAS = {
+    "data": {"data", "date", "dia", "day", "datetime", "timestamp"},
+    "peso": {"peso", "weight", "body weight", "massa", "peso corporal"},
+    "circunferencia_abdomen": {"circunferencia abdomen", "abdomen", "cintura", "waist"},
+    "sono": {"sono", "sleep", "horas de sono", "sleep duration", "asleep", "duracao do sono"},
+    "agua": {"agua", "water", "hidratacao", "ml", "water intake"},
+}
+
+# Destino -> unidade no título -> fator para a unidade gravada
+# (peso em kg, circunferência em cm, sono em horas, água em ml)
+UNIDADES = {
+    "peso": {None: 1.0, "kg": 1.0, "lb": 0.45359237, "lbs": 0.45359237},
+    "circunferencia_abdomen": {None: 1.0, "cm": 1.0, "in": 2.54, "pol": 2.54},
+    "sono": {None: 1.0, "h": 1.0, "horas": 1.0, "hours": 1.0, "min": 1 / 60, "minutos": 1 / 60,
+             "minutes": 1 / 60},
+    "agua": {None: 1.0, "ml": 1.0, "l": 1000.0, "litros": 1000.0, "oz": 29.5735},
+}
+
+FORMATOS_DATA = ["%Y-%m-%d", "%d/%m/%Y", "%Y/%m/%d", "%d-%m-%Y", "%d.%m.%Y"]
+
+def interpreta_cabecalho(cabecalho, escolhidas=None):
+    # -> {destino: (índice, fator)}; `escolhidas` ({destino: título}) tem prioridade
+    escolhidas = {destino: normaliza(titulo) for destino, titulo in (escolhidas or {}).items()}
+    colunas = {}
+    for i, titulo in enumerate(cabecalho):
+        chave = normaliza(titulo)
+        partes = re.match(r"^(.*?)\s*\(([^)]+)\)$", chave)
+        nome, unidade = (partes.group(1), partes.group(2)) if partes else (chave, None)
+        for destino, aceitos in COLUNAS.items():
+            if destino in colunas:
+                continue
+            if escolhidas.get(destino) in (chave, nome) or (destino not in escolhidas and nome in aceitos):
+                fatores = UNIDADES.get(destino, {None: 1.0})
+                if unidade not in fatores:
+                    raise ArquivoInvalido(f"unidade desconhecida na coluna {titulo!r}")
+                colunas[destino] = (i, fatores[unidade])
+                break
+    if "data" not in colunas:
+        raise ArquivoInvalido("o arquivo não tem coluna de data (use --coluna data=<título>)")
+    if not set(colunas) & {"peso", "sono", "agua"}:
+        raise ArquivoInvalido("nenhuma coluna de peso, sono ou água encontrada")
+    return colunas
+
+def converte_data(bruto):
+    texto = bruto.strip()[:19]
+    if re.match(r"^\d{4}-\d{2}-\d{2}[T ]", texto):
+        texto = texto[:10]
+    for formato in FORMATOS_DATA:
+        try:
+            return datetime.strptime(texto, formato).strftime("%Y-%m-%d")
+        except ValueError:
+            continue
+    raise LinhaInvalida(f"data inválida: {bruto!r}")
+
+def ler_historico(arquivo, delimitador, erros, escolhidas=None):
+    # Lê o arquivo inteiro, linha a linha, acumulando um valor por dia
+    leitor = csv.reader(arquivo, delimiter=delimitador)
+    cabecalho = next(leitor, None)
+    if cabecalho is None:
+        raise ArquivoInvalido("arquivo vazio")
+    colunas = interpreta_cabecalho(cabecalho, escolhidas)
+    progresso, agua, sono = {}, {}, {}
+    for linha in leitor:
+        if not any(campo.strip() for campo in linha):
+            continue
+        try:
+            valores = {}
+            for destino, (i, fator) in colunas.items():
+                bruto = linha[i] if i < len(linha) else ""
+                if destino == "data":
+                    valores["data"] = converte_data(bruto)
+                else:
+                    valor = converte_valor(bruto)
+                    if valor is not None:
+                        valores[destino] = valor * fator
+        except LinhaInvalida as erro:
+            erros["total"] += 1
+            if len(erros["exemplos"]) < 10:
+                erros["exemplos"].append(f"linha {leitor.line_num}: {erro}")
+            continue
+        data = valores["data"]
+        if "peso" in valores:
+            circunferencia = valores.get("circunferencia_abdomen")
+            progresso[data] = (round(valores["peso"], 2),
+                               round(circunferencia) if circunferencia is not None else None)
+        if "agua" in valores:
+            agua[data] = agua.get(data, 0) + round(valores["agua"])
+        if "sono" in valores:
+            sono[data] = round(valores["sono"], 2)
+    return progresso, agua, sono
+
+def import_history(user_id, arquivo, delimitador=None, escolhidas=None):
+    # Usado pela CLI e pelo upload no app; retorna (resultado por tabela, erros)
+    erros = {"total": 0, "exemplos": []}
+    delimitador = delimitador or detecta_delimitador(arquivo)
+    progresso, agua, sono = ler_historico(arquivo, delimitador, erros, escolhidas)
+    return database.backfill_history(user_id, progresso, agua, sono), erros
+
+def main():
+    parser = argparse.ArgumentParser(description="Importa histórico de peso, sono e água (CSV).")
+    parser.add_argument("email")
+    parser.add_argument("arquivo")
+    parser.add_argument("--coluna", action="append", default=[], metavar="DESTINO=TÍTULO",
+                        help=f"mapeia uma coluna do arquivo; destinos: {', '.join(COLUNAS)}")
+    parser.add_argument("--encoding", default="utf-8-sig")
+    parser.add_argument("--delimitador", help="detectado automaticamente se omitido")
+    database.add_database_argument(parser)
+    args = parser.parse_args()
+
+    escolhidas = {}
+    for mapeamento in args.coluna:
+        destino, _, titulo = mapeamento.partition("=")
+        if destino not in COLUNAS or not titulo:
+            raise SystemExit(f"Erro: mapeamento inválido {mapeamento!r}")
+        escolhidas[destino] = titulo
+
+    database.prepare_cli_database(args.banco)
+    user_id = database.cli_user_id(args.email)
+
+    inicio = time.perf_counter()
+    with open(args.arquivo, encoding=args.encoding, newline="") as arquivo:
+        try:
+            resultado, erros = import_history(user_id, arquivo, args.delimitador, escolhidas)
+        except ArquivoInvalido as erro:
+            raise SystemExit(f"Erro: {erro}")
+    for tabela, (inseridos, ignorados) in resultado.items():
+        print(f"{tabela}: {inseridos} dias importados, {ignorados} já existentes")
+    print(f"Inválidos: {erros['total']} | Tempo: {time.perf_counter() - inicio:.1f}s")
+    for exemplo in erros["exemplos"]:
+        print(f"  - {exemplo}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+# Motor de nutrientes: o catálogo foods fica em uma matriz NumPy densa
+# (alimentos x nutrientes) e os valores de cada item da refeição em montagem
+# saem de um produto vetorizado, sem laço por item. Totais de refeições, dias
+# e períodos já gravados são somados no SQLite (database.TOTAIS_SQL).
+#
+# Regra de unidades (igual a database.FATOR_SQL): "g" é relativo ao peso da
+# porção cadastrada (gramas_porcao, 100g quando desconhecido); unidades,
+# colheres e xícaras usam o peso da medida do alimento (gramas_unidade,
+# gramas_colher, gramas_xicara) e, quando ele não existe, multiplicam a porção.
+import threading
+
+import numpy as np
+
+import database
+
+NUTRIENTES = ["calorias", "proteina", "carboidrato", "gordura"]
+UNIDADES = ["g"] + list(database.UNIDADES_MEDIDA)
+
+class NutrientEngine:
+    def __init__(self, rows, versao=None):
+        # rows: (food_id, gramas_porcao, gramas por unidade / colher / xícara,
+        #        calorias, proteina, carboidrato, gordura)
+        self.versao = versao
+        self.food_ids = np.array([row[0] for row in rows], dtype=np.int64)
+        self.indice = {food_id: i for i, food_id in enumerate(self.food_ids.tolist())}
+        self.matriz = np.array([row[len(UNIDADES) + 1:] for row in rows],
+                               dtype=np.float64).reshape(-1, len(NUTRIENTES))
+        gramas = np.array([row[1] or 100.0 for row in rows], dtype=np.float64)
+        # Tabela de conversão (alimentos x unidades): porções por 1 da unidade.
+        # Medida sem peso (NaN) multiplica a porção, como antes da migração 13.
+        medidas = np.array([row[2:len(UNIDADES) + 1] for row in rows],
+                           dtype=np.float64).reshape(-1, len(UNIDADES) - 1)
+        self.conversao = np.ones((len(rows), len(UNIDADES)), dtype=np.float64)
+        self.conversao[:, 0] = 1.0 / gramas
+        self.conversao[:, 1:] = np.where(np.isnan(medidas), 1.0, medidas / gramas[:, None])
+        self.unidade_indice = {unidade: j for j, unidade in enumerate(UNIDADES)}
+
+    def _indices(self, food_ids, unidades):
+        try:
+            linhas = np.fromiter((self.indice[f] for f in food_ids), dtype=np.int64)
+        except KeyError as erro:
+            raise KeyError(f"alimento {erro.args[0]} não está no catálogo") from None
+        try:
+            colunas = np.fromiter((self.unidade_indice[u] for u in unidades), dtype=np.int64)
+        except KeyError as erro:
+            raise ValueError(f"unidade desconhecida: {erro.args[0]!r}") from None
+        return linhas, colunas
+
+    def item_values(self, food_ids, unidades, quantidades):
+        # Nutrientes de cada item: matriz (itens x nutrientes)
+        linhas, colunas = self._indices(food_ids, unidades)
+        porcoes = np.asarray(quantidades, dtype=np.float64) * self.conversao[linhas, colunas]
+        return self.matriz[linhas] * porcoes[:, None]
+
+# --- MOTOR COMPARTILHADO ---
+# Uma matriz por processo, recarregada quando o catálogo muda (catalog_version)
+# ou quando o banco é trocado (configure_database)
+_engine = None
+_engine_chave = None
+_engine_lock = threading.Lock()
+
+def get_engine():
+    global _engine, _engine_chave
+    chave = (database.DB_PATH, database.get_catalog_version())
+    if chave != _engine_chave:
+        with _engine_lock:
+            if chave != _engine_chave:
+                versao, rows = database.load_nutrient_catalog()
+                _engine = NutrientEngine(rows, versao)
+                _engine_chave = (chave[0], versao)
+    return _engine
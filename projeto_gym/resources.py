@@ -0,0 +1,53 @@
+# Recursos estáticos do app: catálogo de exercícios, dias da semana, frases
+# motivacionais, piadas e o CSS (style.css), lido e compactado uma única vez.
+import functools
+import os
+import re
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CSS_PATH = os.path.join(BASE_DIR, "style.css")
+
+# --- CATÁLOGO DE EXERCÍCIOS ---
+GRUPOS_MUSCULARES = {
+    "Peito": ("Supino reto", "Supino inclinado", "Crucifixo", "Flexão", "Crossover"),
+    "Costas": ("Puxada frontal", "Remada curvada", "Pull-down", "Barra fixa", "Pulley"),
+    "Pernas": ("Agachamento", "Leg press", "Cadeira extensora", "Stiff", "Afundo", "Cadeira flexora"),
+    "Ombros": ("Desenvolvimento", "Elevação lateral", "Remada alta", "Face pull", "Elevação frontal"),
+    "Braços": ("Rosca direta", "Tríceps testa", "Rosca martelo", "Tríceps pulley", "Rosca scott"),
+    "Abdômen": ("Abdominal crunch", "Prancha", "Elevação de pernas", "Russian twist", "Abdominal bicicleta"),
+}
+
+DIAS_SEMANA = ("Segunda", "Terça", "Quarta", "Quinta", "Sexta", "Sábado", "Domingo")
+
+# --- FRASES E PIADAS ---
+FRASES_MOTIVACIONAIS = (
+    "Acredite em você! Cada passo conta.",
+    "Você é mais forte do que imagina.",
+    "Disciplina é o caminho para o sucesso.",
+    "Não desista, o progresso é construído dia após dia.",
+    "Seu esforço de hoje é o resultado de amanhã.",
+    "A jornada pode ser difícil, mas a vitória é certa para quem persiste.",
+    "Seja constante, não perfeito.",
+    "O impossível é apenas o possível que nunca foi tentado.",
+)
+
+PIADAS = (
+    "Por que o computador foi ao médico? Porque estava com um vírus!",
+    "O que o zero disse para o oito? Belo cinto!",
+    "Por que o livro foi ao hospital? Porque ele tinha muitas páginas amarelas.",
+    "O que o tomate foi fazer no banco? Tirar extrato.",
+)
+
+# --- CSS ---
+def minify_css(css):
+    # Remove comentários e espaços supérfluos (bloco menor a cada rerun)
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.S)
+    css = re.sub(r"\s+", " ", css)
+    css = re.sub(r"\s*([{};,>])\s*", r"\1", css)
+    css = re.sub(r":\s+", ":", css)  # antes do ":" o espaço pode ser seletor de descendente
+    return css.replace(";}", "}").strip()
+
+@functools.lru_cache(maxsize=None)
+def get_css(path=CSS_PATH):
+    with open(path, encoding="utf-8") as arquivo:
+        return f"<style>{minify_css(arquivo.read())}</style>"
@@ -0,0 +1,23 @@
+# Os testes importam os módulos do app (database, nutrition...) direto de
+# projeto_gym/, como o app.py e os scripts fazem.
+# Uso (a partir de projeto_gym/):
+#   python -m pytest -q tests
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database  # noqa: E402
+
+@pytest.fixture
+def banco(tmp_path):
+    # Banco novo e migrado por teste; no fim volta ao banco e ao modo de escrita anteriores
+    original, modo = database.DB_PATH, database.WRITE_BEHIND_MODO
+    caminho = str(tmp_path / "fitnesshub.db")
+    database.configure_database(caminho)
+    database.run_migrations()
+    yield caminho
+    database.configure_write_behind(modo)
+    database.configure_database(original)
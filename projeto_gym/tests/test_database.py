@@ -0,0 +1,50 @@
+import sqlite3
+
+import pytest
+
+import database
+
+def test_troca_de_banco_grava_fila_no_banco_antigo(banco, tmp_path):
+    database.add_user("fila@fitbuddy.com", "senha")
+    user_id = database.login_user("fila@fitbuddy.com", "senha")
+    # async: o save só enfileira e a linha fica pendente até o próximo lote
+    database.configure_write_behind("async", intervalo_ms=60_000)
+    database.save_water_log(user_id, {"data": "2024-01-01", "ml": 250})
+    antigo = database.get_pool()
+
+    database.configure_database(str(tmp_path / "outro.db"))
+
+    assert antigo._writer is None and antigo._all_readers == []
+    with sqlite3.connect(banco) as conn:
+        linhas = conn.execute("SELECT user_id, data, ml FROM water_log").fetchall()
+    assert linhas == [(user_id, "2024-01-01", 250)]
+
+def test_cache_devolve_copia_de_tuplas(banco):
+    database.add_user("cache@fitbuddy.com", "senha")
+    user_id = database.login_user("cache@fitbuddy.com", "senha")
+    database.save_workout_history(user_id, {"plano": "A", "data": "2024-01-01", "inicio": "2024-01-01 08:00:00",
+                                            "fim": "2024-01-01 09:00:00", "duracao": 3600.0,
+                                            "exercicios_completos": ["Peito"]})
+    # load_workout_history_page devolve (página, cursor): a página dentro da
+    # tupla também é copiada, então alterá-la não altera o cache
+    pagina, _ = database.load_workout_history_page(user_id)
+    pagina[0]["plano"] = "alterado"
+    pagina.clear()
+    assert database.load_workout_history_page(user_id)[0][0]["plano"] == "A"
+    assert len(database._read_cache) == database.read_cache_stats()["entradas"] == 1
+
+def test_reimportar_alimento_atualiza_resumo_diario(banco):
+    database.add_user("import@fitbuddy.com", "senha")
+    user_id = database.login_user("import@fitbuddy.com", "senha")
+    alimento = {"codigo": "1", "nome": "Lentilha cozida", "categoria": "Leguminosas", "calorias": 116.0,
+                "proteina": 9.0, "carboidrato": 20.1, "gordura": 0.4, "nutrientes": {}}
+    database.upsert_foods([alimento], "TESTE")
+    database.save_food_log(user_id, {"data": "2024-01-01", "alimentos": [
+        {"nome": "Lentilha cozida", "quantidade": 200.0, "unidade": "g"},
+        {"nome": "Ovo (1 unidade)", "quantidade": 1, "unidade": "unidades"}]})
+    antes = database.load_daily_summary(user_id)[0]["calorias"]  # também preenche o cache
+
+    database.upsert_foods([dict(alimento, calorias=216.0)], "TESTE")
+
+    assert database.load_daily_summary(user_id)[0]["calorias"] == pytest.approx(antes + 200.0)
+    assert database.load_food_totals(user_id)[0]["calorias"] == pytest.approx(antes + 200.0)
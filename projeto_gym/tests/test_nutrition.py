@@ -0,0 +1,32 @@
+import pytest
+
+import database
+from nutrition import NUTRIENTES, get_engine
+
+def test_totais_sql_e_motor_concordam(banco):
+    database.add_user("refeicao@fitbuddy.com", "senha")
+    user_id = database.login_user("refeicao@fitbuddy.com", "senha")
+    # Importado: porção de 100g e nenhuma medida caseira cadastrada
+    sem_medida = "Lentilha cozida"
+    database.upsert_foods([{"codigo": "1", "nome": sem_medida, "categoria": "Leguminosas", "calorias": 116.0,
+                            "proteina": 9.0, "carboidrato": 20.1, "gordura": 0.4, "nutrientes": {}}], "TESTE")
+    with database.db_reader() as conn:
+        ids = dict(conn.execute("SELECT nome, id FROM foods"))
+    # g, unidades com peso da medida, colheres e xícara sem peso (cai na porção)
+    itens = [
+        {"food_id": ids["Ovo (1 unidade)"], "quantidade": 80.0, "unidade": "g"},
+        {"food_id": ids["Ovo (1 unidade)"], "quantidade": 2, "unidade": "unidades"},
+        {"food_id": ids["Peito de Frango (100g)"], "quantidade": 3, "unidade": "colheres"},
+        {"food_id": ids["Ovo (1 unidade)"], "quantidade": 1, "unidade": "xícaras"},
+        {"food_id": ids[sem_medida], "quantidade": 150.0, "unidade": "g"},
+        {"food_id": ids[sem_medida], "quantidade": 2, "unidade": "unidades"},
+    ]
+    database.save_food_log(user_id, {"data": "2024-01-01", "alimentos": itens})
+
+    motor = get_engine().item_values([a["food_id"] for a in itens], [a["unidade"] for a in itens],
+                                     [a["quantidade"] for a in itens]).sum(axis=0)
+    sql = database.load_food_totals(user_id, "dia")[0]
+    resumo = database.load_daily_summary(user_id, "2024-01-01")[0]
+    for nutriente, valor in zip(NUTRIENTES, motor.tolist()):
+        assert sql[nutriente] == pytest.approx(valor)
+        assert resumo[nutriente] == pytest.approx(valor)
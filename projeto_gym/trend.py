@@ -0,0 +1,88 @@
+# Tendência de peso sobre progress_data: média móvel exponencial (EWMA) com
+# peso proporcional ao intervalo entre pesagens, ritmo semanal e previsão da
+# data em que a meta_peso é atingida. O ajuste linear é robusto (Theil-Sen)
+# e usa só uma janela das últimas pesagens, então cada pesagem nova custa o
+# mesmo, qualquer que seja o tamanho do histórico.
+from collections import deque
+from datetime import date, timedelta
+import math
+
+import numpy as np
+
+MEIA_VIDA_DIAS = 7.0
+JANELA_AJUSTE = 60   # pesagens usadas no ajuste linear
+MIN_PONTOS_AJUSTE = 4
+HORIZONTE_DIAS = 730  # previsões além disso não são mostradas
+
+class WeightTrend:
+    def __init__(self, meia_vida_dias=MEIA_VIDA_DIAS, janela=JANELA_AJUSTE):
+        self.tau = meia_vida_dias / math.log(2)
+        self.datas = []       # data de cada pesagem processada
+        self.suavizado = []   # EWMA em cada pesagem
+        self.janela = deque(maxlen=janela)  # (dia ordinal, peso)
+        self.ultimo_id = 0
+        self.ultima_data = None
+
+    def update(self, registros):
+        # Registros novos de progress_data (qualquer ordem). Pesagens com data
+        # anterior à última processada exigem recomeçar; devolve False nesse caso.
+        novos = sorted((r for r in registros if r["id"] > self.ultimo_id and r.get("peso")),
+                       key=lambda r: (r["data"], r["id"]))
+        if novos and self.ultima_data and novos[0]["data"] < self.ultima_data:
+            return False
+        for registro in novos:
+            dia = date.fromisoformat(registro["data"])
+            peso = float(registro["peso"])
+            if self.suavizado:
+                intervalo = max((dia - self.datas[-1]).days, 1)
+                alfa = 1 - math.exp(-intervalo / self.tau)
+                self.suavizado.append(self.suavizado[-1] + alfa * (peso - self.suavizado[-1]))
+            else:
+                self.suavizado.append(peso)
+            self.datas.append(dia)
+            self.janela.append((dia.toordinal(), peso))
+            self.ultimo_id = max(self.ultimo_id, registro["id"])
+            self.ultima_data = registro["data"]
+        return True
+
+    def fit(self):
+        # Theil-Sen: mediana das inclinações entre todos os pares da janela,
+        # insensível a pesagens fora da curva (roupa, retenção de líquido...)
+        if len(self.janela) < MIN_PONTOS_AJUSTE:
+            return None
+        x, y = np.array(self.janela, dtype=np.float64).T
+        i, j = np.triu_indices(len(x), k=1)
+        dx = x[j] - x[i]
+        validos = dx > 0
+        if not validos.any():
+            return None
+        inclinacao = float(np.median((y[j] - y[i])[validos] / dx[validos]))
+        intercepto = float(np.median(y - inclinacao * x))
+        return inclinacao, intercepto
+
+    def summary(self, meta_peso=None):
+        if not self.suavizado:
+            return None
+        resumo = {"tendencia": self.suavizado[-1], "ritmo_semanal": None, "previsao_meta": None,
+                  "ajuste": None}
+        ajuste = self.fit()
+        if ajuste is None:
+            return resumo
+        inclinacao, intercepto = ajuste
+        resumo["ritmo_semanal"] = inclinacao * 7
+        atual = intercepto + inclinacao * self.datas[-1].toordinal()
+        resumo["ajuste"] = (self.datas[-1], atual, inclinacao)
+        if meta_peso:
+            falta = meta_peso - atual
+            if abs(falta) < 0.05:
+                resumo["previsao_meta"] = self.datas[-1]
+            elif inclinacao and falta / inclinacao > 0:
+                dias = falta / inclinacao
+                if dias <= HORIZONTE_DIAS:
+                    resumo["previsao_meta"] = self.datas[-1] + timedelta(days=math.ceil(dias))
+        return resumo
+
+def build_trend(registros):
+    tendencia = WeightTrend()
+    tendencia.update(registros)
+    return tendencia